@@ -2,14 +2,22 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import PyPDF2
-from docx import Document
-import re
-import requests
-import time
+import hashlib
+import io
 import json
+import math
 from datetime import datetime
-import io
+
+import config
+from bibliocheck.batch import run_batch
+from bibliocheck.cache import get_cache
+from bibliocheck.coalesce import get_flights
+from bibliocheck.extraction import extract_document
+from bibliocheck.history import (RETRYABLE_STATUSES, diff_runs, get_verdict_store, last_run,
+                                 record_run, run_entries)
+from bibliocheck.jobs import get_job_manager
+from bibliocheck.parsing import merge_field_citations
+from bibliocheck.report import STATUSES, build_report
 
 # Configurazione pagina
 st.set_page_config(
@@ -52,258 +60,405 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Classe per rappresentare una citazione
-class Citation:
-    def __init__(self, original_text, authors=None, year=None, title=None, doi=None):
-        self.original_text = original_text
-        self.authors = authors or []
-        self.year = year
-        self.title = title
-        self.doi = doi
-
-# Funzione per estrarre testo da PDF
-def extract_text_from_pdf(uploaded_file):
-    try:
-        pdf_reader = PyPDF2.PdfReader(uploaded_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Errore nell'estrazione PDF: {str(e)}")
-        return ""
-
-# Funzione per estrarre testo da DOCX
-def extract_text_from_docx(uploaded_file):
-    try:
-        doc = Document(uploaded_file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Errore nell'estrazione DOCX: {str(e)}")
-        return ""
-
-# Funzione per trovare la sezione bibliografia
-def find_bibliography_section(text):
-    # Pattern per identificare inizio bibliografia
-    patterns = [
-        r'(?i)references?\s*\n',
-        r'(?i)bibliography\s*\n', 
-        r'(?i)works?\s+cited\s*\n',
-        r'(?i)riferimenti\s+bibliografici?\s*\n',
-        r'(?i)bibliografia\s*\n'
-    ]
+# Verifica di più documenti in un'unica esecuzione
+def batch_verification(uploaded_files, budget):
+    st.success(f"✅ {len(uploaded_files)} file caricati")
+    st.caption(f"⏱️ Tempo massimo: {budget} secondi per documento")
     
-    for pattern in patterns:
-        match = re.search(pattern, text)
-        if match:
-            # Restituisce dal punto trovato fino alla fine
-            return text[match.start():]
-    
-    # Se non trova pattern specifici, prende ultima parte del documento (70%)
-    return text[int(len(text) * 0.7):]
-
-# Funzione per estrarre citazioni (semplificata per iniziare)
-def extract_citations(text):
-    bib_section = find_bibliography_section(text)
-    citations = []
+    sources = [(f.name, f.getvalue()) for f in uploaded_files]
+    # Risultati conservati per contenuto dei file e tempo massimo: i rerun non rifanno la verifica
+    batch_key = (tuple(file_hash(content) for _, content in sources), budget)
+    batches = st.session_state.setdefault('batches', {})
     
-    # Dividi in righe e cerca quelle che sembrano citazioni
-    lines = bib_section.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        # Criteri base per identificare una citazione:
-        # - Lunghezza ragionevole
-        # - Contiene numeri (anni)
-        # - Contiene punto (fine frase)
-        if len(line) > 30 and any(char.isdigit() for char in line) and '.' in line:
-            # Estrai anno se presente
-            year_match = re.search(r'\b(19|20)\d{2}\b', line)
-            year = year_match.group() if year_match else None
-            
-            # Estrai DOI se presente  
-            doi_match = re.search(r'10\.\d+/[^\s]+', line)
-            doi = doi_match.group() if doi_match else None
-            
-            # Estrai autori (pattern semplificato)
-            authors = []
-            # Cerca pattern come "Cognome, N." all'inizio
-            author_match = re.search(r'^([A-Z][a-z]+(?:,\s[A-Z]\.?)*)', line)
-            if author_match:
-                authors = [author_match.group().strip()]
-            
-            # Estrai titolo (tra virgolette o pattern comune)
-            title = None
-            title_patterns = [
-                r'"([^"]+)"',  # Titolo tra virgolette
-                r'\.?\s([A-Z][^.]+)\.',  # Titolo dopo punto iniziale
-            ]
-            
-            for pattern in title_patterns:
-                title_match = re.search(pattern, line)
-                if title_match and len(title_match.group(1)) > 10:
-                    title = title_match.group(1).strip()
-                    break
-            
-            # Crea oggetto citazione
-            citation = Citation(
-                original_text=line,
-                authors=authors,
-                year=year,
-                title=title,
-                doi=doi
-            )
-            citations.append(citation)
-    
-    return citations
-
-# Funzione per cercare su CrossRef (database gratuito)
-def search_crossref(query, max_results=3):
-    try:
-        url = "https://api.crossref.org/works"
-        params = {
-            'query': query,
-            'rows': max_results,
-            'sort': 'relevance'
-        }
+    if st.button("🚀 Avvia Verifica Batch", type="primary"):
+        st.header("🔍 Verifica in Corso...")
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        status_text.text("📄 Estrazione citazioni dai documenti...")
         
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code != 200:
-            return []
+        completed = 0
         
-        data = response.json()
-        results = []
+        def on_result(i, result):
+            nonlocal completed
+            completed += 1
+            status_text.text(f"Verificate {completed} citazioni...")
         
-        if 'message' in data and 'items' in data['message']:
-            for item in data['message']['items']:
-                try:
-                    title = ' '.join(item.get('title', ['']))
-                    
-                    authors = []
-                    for author in item.get('author', [])[:3]:
-                        if 'family' in author:
-                            name = author['family']
-                            if 'given' in author:
-                                name += f", {author['given']}"
-                            authors.append(name)
-                    
-                    year = None
-                    if 'published-print' in item:
-                        year = str(item['published-print']['date-parts'][0][0])
-                    elif 'published-online' in item:
-                        year = str(item['published-online']['date-parts'][0][0])
-                    
-                    journal = item.get('container-title', [None])[0]
-                    doi = item.get('DOI', '')
-                    
-                    results.append({
-                        'title': title,
-                        'authors': authors,
-                        'year': year,
-                        'journal': journal,
-                        'doi': doi,
-                        'database': 'CrossRef'
-                    })
-                except Exception:
-                    continue
+        batches[batch_key] = run_batch(sources, on_result=on_result, budget=budget)
         
-        return results
-    except Exception as e:
-        st.warning(f"Errore ricerca CrossRef: {str(e)}")
-        return []
-
-# Funzione per calcolare similarità (semplificata)
-def calculate_similarity(citation, result):
-    from fuzzywuzzy import fuzz
+        progress_bar.progress(1.0)
+        status_text.text("✅ Verifica completata!")
     
-    score = 0
-    factors = 0
+    batch = batches.get(batch_key)
+    if batch is None:
+        return
+    rollup = batch['rollup']
     
-    # Confronta titoli
-    if citation.title and result['title']:
-        title_sim = fuzz.token_set_ratio(citation.title.lower(), result['title'].lower()) / 100
-        score += title_sim * 0.5
-        factors += 0.5
+    st.header("📊 Risultati Batch")
     
-    # Confronta anni
-    if citation.year and result['year']:
-        if citation.year == result['year']:
-            score += 0.3
-        elif abs(int(citation.year) - int(result['year'])) <= 1:
-            score += 0.2
-        factors += 0.3
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("📄 Documenti", rollup['processed_documents'])
+    with col2:
+        st.metric("📚 Citazioni", rollup['total_citations'])
+    with col3:
+        st.metric("✅ Verificate", rollup['summary']['verified'], f"{rollup['accuracy_percentage']:.1f}%")
+    with col4:
+        st.metric("❌ Errori", rollup['summary']['error'])
     
-    # Confronta autori
-    if citation.authors and result['authors']:
-        author_sim = 0
-        for c_author in citation.authors:
-            for r_author in result['authors']:
-                sim = fuzz.ratio(c_author.lower(), r_author.lower()) / 100
-                author_sim = max(author_sim, sim)
-        score += author_sim * 0.2
-        factors += 0.2
+    for failed in rollup['failed_documents']:
+        st.warning(f"⚠️ {failed['filename']}: {failed['error']}")
     
-    return score / factors if factors > 0 else 0
-
-# Funzione principale per verificare una citazione
-def verify_citation(citation):
-    # Prepara query di ricerca
-    query_parts = []
+    if rollup['per_document']:
+        st.dataframe(pd.DataFrame(rollup['per_document']), use_container_width=True)
     
-    if citation.title and len(citation.title) > 5:
-        query_parts.append(f'"{citation.title}"')
+    st.header("📥 Report")
+    st.download_button(
+        label="📊 Scarica Report Batch",
+        data=json.dumps(batch, indent=2, ensure_ascii=False),
+        file_name=f"bibliography_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+        mime="application/json"
+    )
+
+# Impronta del contenuto caricato, chiave delle cache della sessione
+def file_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+# Estrazione e parsing memorizzati per contenuto del file: i rerun non rileggono il documento
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_citations(digest, filename, _content):
+    text, citations = extract_document(io.BytesIO(_content), filename=filename)
+    # Le citazioni di Zotero/Mendeley sono già strutturate; dal testo si aggiungono
+    # solo i riferimenti scritti a mano che non le duplicano
+    return text, merge_field_citations(citations, text)
+
+# Stato della verifica di un file, conservato tra i rerun della sessione
+def verification_state(digest, filename):
+    verifications = st.session_state.setdefault('verifications', {})
+    if digest not in verifications:
+        verifications[digest] = {
+            'results': {},  # posizione della citazione -> risultato
+            'previous_run': last_run(get_verdict_store(), filename),
+            'diff': None,
+            'job': None     # job in corso: {'id': ..., 'positions': [...]}
+        }
+    return verifications[digest]
+
+# Risultati disponibili tra le prime `count` citazioni, in ordine
+def ordered_results(state, count):
+    return [state['results'][i] for i in range(count) if i in state['results']]
+
+# Citazioni ancora da verificare: mai verificate, non raggiunte in tempo o con database non raggiungibili
+def pending_positions(state, count):
+    return [i for i in range(count)
+            if i not in state['results'] or state['results'][i]['status'] in RETRYABLE_STATUSES]
+
+# Job di questa sessione, più recenti prima: il gestore dei job è condiviso da tutti gli utenti
+def remember_job(job_id):
+    session_jobs = st.session_state.setdefault('session_jobs', [])
+    if job_id in session_jobs:
+        session_jobs.remove(job_id)
+    session_jobs.insert(0, job_id)
+
+# Avvia in background la verifica delle citazioni non ancora verificate
+def submit_pending(state, citations, positions, filename, budget):
+    job_id = get_job_manager().submit([citations[i] for i in positions], filename, budget)
+    remember_job(job_id)
+    state['job'] = {'id': job_id, 'positions': positions}
+    # L'ID nell'URL permette di riagganciarsi al job dopo aver chiuso la pagina
+    st.query_params['job'] = job_id
+
+# Nomi e colori degli status nel grafico
+STATUS_LABELS = {
+    'verified': 'Verificate',
+    'error': 'Errori',
+    'not_found': 'Non Trovate',
+    'uncertain': 'Incerte',
+    'unavailable': 'Non Verificabili',
+    'unverified': 'Non Raggiunte',
+}
+STATUS_COLORS = {
+    'Verificate': '#38a169',
+    'Errori': '#e53e3e',
+    'Non Trovate': '#d69e2e',
+    'Incerte': '#805ad5',
+    'Non Verificabili': '#718096',
+    'Non Raggiunte': '#a0aec0'
+}
+
+# Risultati arrivati finora in forma colonnare (None = citazione ancora in verifica);
+# '#' è la posizione nella lista, per risalire al dettaglio
+def results_frame(results):
+    arrived = [(i + 1, r) for i, r in enumerate(results) if r is not None]
+    return pd.DataFrame({
+        '#': pd.Series([i for i, _ in arrived], dtype='int64'),
+        'Status': pd.Categorical([r['status'] for _, r in arrived], categories=STATUSES),
+        'Score': pd.Series([round(r['score'], 2) for _, r in arrived], dtype='float64'),
+        'Errori': pd.Series([len(r['errors']) for _, r in arrived], dtype='int64'),
+        'Citazione': pd.Series([r['citation'].original_text for _, r in arrived], dtype='object'),
+        'Match': pd.Series([(r['best_match'] or {}).get('title') or '' for _, r in arrived],
+                           dtype='object'),
+    })
+
+# Conteggio per status in un'unica aggregazione (tutti gli status, anche a zero)
+def status_counts(frame):
+    return frame['Status'].value_counts(sort=False).reindex(list(STATUSES), fill_value=0)
+
+# Avanzamento di un job: i risultati compaiono appena verificati, senza rieseguire lo script
+@st.fragment(run_every=config.JOB_POLL_SECONDS)
+def live_job(job_id, show_progress):
+    manager = get_job_manager()
+    job = manager.status(job_id)
+    if job['status'] not in ('queued', 'running'):
+        # Job terminato: riesecuzione completa per mostrare il report
+        st.rerun()
     
-    if citation.authors:
-        # Prendi primo autore
-        first_author = citation.authors[0].split(',')[0]
-        query_parts.append(first_author)
+    results = manager.results(job_id)
+    frame = results_frame(results)
+    done = len(frame)
     
-    if citation.year:
-        query_parts.append(citation.year)
+    st.header("🔍 Verifica in Corso...")
+    st.progress(done / job['total'] if job['total'] else 0.0)
+    st.text(f"Verificate {done}/{job['total']} citazioni...")
+    st.caption(f"🆔 Job {job_id}: la verifica prosegue anche chiudendo la pagina")
     
-    query = ' '.join(query_parts)
+    if st.button("⏹️ Interrompi Verifica"):
+        # I risultati già arrivati restano nel report parziale
+        manager.cancel(job_id)
+        st.rerun()
     
-    # Cerca nei database
-    results = search_crossref(query)
+    if done:
+        counts = show_summary(frame)
+        if show_progress:
+            st.dataframe(frame, use_container_width=True, hide_index=True)
+        if counts['verified'] < done:
+            show_problems(frame, results)
+
+# Segue un job in background; restituisce i risultati quando è terminato o interrotto
+def follow_job(job_id, show_progress, budget):
+    manager = get_job_manager()
+    job = manager.status(job_id)
+    if job is None:
+        st.error(f"❌ Job {job_id} non trovato")
+        return None
     
-    if not results:
-        return {
-            'status': 'not_found',
-            'score': 0,
-            'best_match': None,
-            'errors': ['Citazione non trovata nei database accademici']
-        }
+    if job['status'] in ('queued', 'running'):
+        live_job(job_id, show_progress)
+        return None
     
-    # Trova miglior match
-    best_score = 0
-    best_match = None
+    if job['status'] == 'interrupted' or job['status'] == 'failed':
+        message = "interrotta" if job['status'] == 'interrupted' else f"fallita ({job['error']})"
+        st.warning(f"⚠️ Verifica {message}: {job['completed']}/{job['total']} citazioni salvate")
+        if st.button("▶️ Riprendi Verifica", type="primary"):
+            manager.resume(job_id, budget)
+            st.rerun()
+        return None
     
-    for result in results:
-        score = calculate_similarity(citation, result)
-        if score > best_score:
-            best_score = score
-            best_match = result
+    if job['status'] == 'cancelled':
+        st.warning(f"⏹️ Verifica interrotta: report parziale su "
+                   f"{job['completed']}/{job['total']} citazioni")
     
-    # Determina status
-    errors = []
-    if best_score >= 0.8:
-        status = 'verified'
-    elif best_score >= 0.6:
-        status = 'uncertain'
-        errors.append('Match incerto - verificare manualmente')
-    else:
-        status = 'error'
-        errors.append('Nessun match affidabile trovato')
+    cache = get_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        st.caption(f"💾 Cache: {cache_stats['hits']} risposte riutilizzate, "
+                   f"{cache_stats['misses']} richieste ai database")
+    # Contatori di tutto il server: ricerche identiche di sessioni diverse condividono la richiesta
+    flights = get_flights().stats()
+    if flights['deduplicated']:
+        st.caption(f"🔗 {flights['deduplicated']} ricerche identiche unite a una già in corso "
+                   f"({flights['requests']} richieste inviate)")
+    return manager.results(job_id)
+
+# Mostra un job avviato in un'altra sessione
+def show_job(job_id, show_progress, budget):
+    job = get_job_manager().status(job_id)
+    if job is not None:
+        st.info(f"🔗 Verifica di {job['filename'] or job_id} (job {job_id})")
+    results = follow_job(job_id, show_progress, budget)
+    if results is not None:
+        show_results([r for r in results if r is not None], None, job['filename'] or job_id)
+
+# Unisce i risultati di un job (anche parziali) allo stato della verifica del file
+def merge_job(state, job_results, filename):
+    for position, result in zip(state['job']['positions'], job_results):
+        if result is not None:
+            state['results'][position] = result
+    state['job'] = None
+    results = [state['results'][i] for i in sorted(state['results'])]
+    record_run(get_verdict_store(), filename, results)
+    if state['previous_run'] is not None:
+        state['diff'] = diff_runs(state['previous_run'], run_entries(results))
+
+# Metriche e grafico della distribuzione degli status; restituisce i conteggi
+def show_summary(frame):
+    # Calcola statistiche con un'unica aggregazione
+    counts = status_counts(frame)
+    total = len(frame)
+    verified = counts['verified']
+
+    accuracy = (verified / total * 100) if total > 0 else 0
+
+    # Metriche principali
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("📚 Totali", total)
+    with col2:
+        st.metric("✅ Verificate", verified, f"{accuracy:.1f}%")
+    with col3:
+        st.metric("❌ Errori", counts['error'])
+    with col4:
+        st.metric("❓ Non Trovate", counts['not_found'])
+
+    # Grafico a torta
+    if total > 0:
+        fig_pie = px.pie(
+            values=counts.values,
+            names=[STATUS_LABELS[status] for status in counts.index],
+            title="Distribuzione Status Citazioni",
+            color=[STATUS_LABELS[status] for status in counts.index],
+            color_discrete_map=STATUS_COLORS
+        )
+        st.plotly_chart(fig_pie, use_container_width=True)
+    return counts
+
+# Dettaglio di una citazione, mostrato solo quando viene selezionata
+def show_detail(result):
+    st.markdown(f"**Citazione:** {result['citation'].original_text}")
+    st.markdown(f"**Status:** {result['status']}")
+    st.markdown(f"**Confidence Score:** {result['score']:.2f}")
+
+    if result['errors']:
+        st.markdown("**Errori:**")
+        for error in result['errors']:
+            st.markdown(f"- {error}")
+
+    if result['best_match']:
+        st.markdown("**Miglior match trovato:**")
+        match = result['best_match']
+        st.markdown(f"- **Titolo:** {match['title']}")
+        st.markdown(f"- **Autori:** {', '.join(match['authors'])}")
+        st.markdown(f"- **Anno:** {match['year']}")
+
+# Citazioni problematiche in una tabella paginata, filtrabile e ordinabile;
+# il dettaglio è costruito solo per la riga scelta
+def show_problems(frame, results):
+    problematic = frame[frame['Status'] != 'verified']
+
+    if problematic.empty:
+        st.success("🎉 Tutte le citazioni sono state verificate correttamente!")
+        return
+
+    st.subheader("🚨 Citazioni Problematiche")
+
+    present = [status for status in STATUSES if status != 'verified'
+               and status in set(problematic['Status'])]
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        statuses = st.multiselect("Status", present, default=present, key="problems_status")
+    with col2:
+        query = st.text_input("Cerca nel testo", key="problems_query")
+    with col3:
+        order = st.selectbox("Ordina per", ['#', 'Status', 'Score', 'Errori'], key="problems_order")
+
+    view = problematic[problematic['Status'].isin(statuses)]
+    if query:
+        view = view[view['Citazione'].str.contains(query, case=False, regex=False)
+                    | view['Match'].str.contains(query, case=False, regex=False)]
+    # Più errori prima; per gli altri criteri ordine crescente
+    view = view.sort_values(order, ascending=order != 'Errori', kind='stable')
+
+    if view.empty:
+        st.info("Nessuna citazione corrisponde ai filtri")
+        return
+
+    page_size = config.RESULTS_PAGE_SIZE
+    pages = math.ceil(len(view) / page_size)
+    page = 1
+    if pages > 1:
+        # Con filtri più stretti la pagina scelta può non esistere più
+        if st.session_state.get("problems_page", 1) > pages:
+            st.session_state["problems_page"] = pages
+        page = st.number_input(f"Pagina (di {pages})", min_value=1, max_value=pages,
+                               key="problems_page")
+    rows = view.iloc[(page - 1) * page_size:page * page_size]
+
+    st.dataframe(
+        rows,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Score': st.column_config.ProgressColumn("Score", min_value=0.0, max_value=1.0,
+                                                     format="%.2f"),
+        }
+    )
+    st.caption(f"{len(view)} citazioni problematiche su {len(frame)}"
+               + (f", pagina {page}/{pages}" if pages > 1 else ""))
+
+    texts = dict(zip(rows['#'], rows['Citazione']))
+    position = st.selectbox(
+        "🔎 Dettaglio citazione",
+        list(texts),
+        index=None,
+        format_func=lambda n: f"#{n}: {texts[n][:80]}",
+        placeholder="Scegli una citazione della pagina",
+        key="problems_detail"
+    )
+    if position is not None:
+        show_detail(results[position - 1])
+
+# Risultati, differenze e report di un documento
+def show_results(results, diff, filename):
+    # RISULTATI
+    st.header("📊 Risultati")
+
+    reused = sum(1 for r in results if r.get('reused'))
+    if reused:
+        st.caption(f"♻️ {reused} citazioni invariate dall'ultima verifica, esito riutilizzato")
     
-    return {
-        'status': status,
-        'score': best_score,
-        'best_match': best_match,
-        'errors': errors
-    }
+    frame = results_frame(results)
+    counts = show_summary(frame)
+    if counts['unverified']:
+        st.warning(f"⏱️ {counts['unverified']} citazioni non raggiunte entro il tempo massimo: "
+                   f"sono segnate come 'unverified' e una nuova verifica riprende solo da quelle")
+    show_problems(frame, results)
+
+    # Differenze rispetto alla verifica precedente dello stesso documento
+    if diff is not None:
+        st.subheader("🔄 Modifiche dall'ultima verifica")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("➕ Aggiunte/modificate", len(diff['added']))
+        with col2:
+            st.metric("➖ Rimosse", len(diff['removed']))
+        with col3:
+            st.metric("🔀 Esito cambiato", len(diff['status_changed']))
+        with col4:
+            st.metric("＝ Invariate", diff['unchanged'])
+
+        with st.expander("Dettaglio modifiche"):
+            for text in diff['added']:
+                st.markdown(f"- ➕ {text[:120]}")
+            for text in diff['removed']:
+                st.markdown(f"- ➖ {text[:120]}")
+            for change in diff['status_changed']:
+                st.markdown(f"- 🔀 {change['original_text'][:100]}: "
+                            f"{change['previous_status']} → {change['status']}")
+
+    # Download report
+    st.header("📥 Report")
+
+    report_data = build_report(results, filename, diff)
+
+    # Bottone download
+    report_json = json.dumps(report_data, indent=2, ensure_ascii=False)
+
+    st.download_button(
+        label="📊 Scarica Report Completo",
+        data=report_json,
+        file_name=f"bibliography_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+        mime="application/json"
+    )
 
 # INTERFACCIA PRINCIPALE
 def main():
@@ -315,30 +470,49 @@ def main():
     </div>
     """, unsafe_allow_html=True)
     
+    # Chi ha il link a un job lo ritrova anche tra le verifiche recenti della sessione
+    if 'job' in st.query_params and get_job_manager().status(st.query_params['job']) is not None:
+        remember_job(st.query_params['job'])
+    
     # Sidebar con informazioni
     with st.sidebar:
         st.header("ℹ️ Come funziona")
         st.markdown("""
-        1. **Carica** il tuo PDF o DOCX
+        1. **Carica** il tuo PDF o DOCX (o un export .bib, .ris, CSL-JSON)
         2. **Estrazione** automatica citazioni  
         3. **Verifica** su database accademici
         4. **Report** dettagliato con errori
         
-        **Database utilizzati:**
-        - CrossRef (DOI e metadati)
-        - Altri in arrivo...
         """)
+        st.markdown(config.get_database_info())
         
         st.header("⚙️ Impostazioni")
-        max_citations = st.slider("Max citazioni", 10, 50, 25)
+        budget = st.slider(
+            "Tempo massimo (secondi)", 30, 600, config.RUN_BUDGET_SECONDS, step=30,
+            help="Le citazioni sono verificate per priorità (prima quelle con DOI, poi quelle "
+                 "incomplete, poi le altre); quelle non raggiunte in tempo restano da verificare"
+        )
         show_progress = st.checkbox("Mostra dettagli", True)
+        
+        # Verifiche in background avviate (o riagganciate con ?job=) in questa sessione
+        manager = get_job_manager()
+        recent_jobs = [manager.status(job_id) for job_id in st.session_state.get('session_jobs', [])[:5]]
+        recent_jobs = [job for job in recent_jobs if job is not None]
+        if recent_jobs:
+            st.header("🗂️ Verifiche Recenti")
+            for job in recent_jobs:
+                label = f"{job['filename'] or job['id']} · {job['completed']}/{job['total']} · {job['status']}"
+                if st.button(label, key=f"job_{job['id']}"):
+                    st.query_params['job'] = job['id']
     
     # Area di upload
     st.header("📤 Carica Documento")
     
-    uploaded_file = st.file_uploader(
-        "Seleziona PDF o DOCX",
-        type=['pdf', 'docx'],
+    batch_enabled = config.FEATURES["enable_batch_processing"]
+    uploaded = st.file_uploader(
+        "Seleziona PDF, DOCX o file di riferimenti (.bib, .ris, CSL-JSON)",
+        type=[extension.lstrip('.') for extension in config.SUPPORTED_FORMATS],
+        accept_multiple_files=batch_enabled,
         help="Carica il documento contenente la bibliografia"
     )
     
@@ -346,183 +520,73 @@ def main():
     if st.button("🧪 Prova con Esempio"):
         st.info("Per ora carica un file vero. Esempi in arrivo!")
     
+    if batch_enabled:
+        if len(uploaded) > 1:
+            batch_verification(uploaded, budget)
+            return
+        uploaded_file = uploaded[0] if uploaded else None
+    else:
+        uploaded_file = uploaded
+    
+    # Senza file caricato ci si riaggancia al job indicato nell'URL
+    if uploaded_file is None and 'job' in st.query_params:
+        show_job(st.query_params['job'], show_progress, budget)
+        return
+    
     # Processamento del file
     if uploaded_file is not None:
         st.success(f"✅ File caricato: {uploaded_file.name}")
         
+        content = uploaded_file.getvalue()
+        digest = file_hash(content)
+        
         # Pulsante per avviare verifica
-        if st.button("🚀 Avvia Verifica Bibliografia", type="primary"):
-            
-            # Estrai testo dal documento
-            with st.spinner("📄 Estrazione testo dal documento..."):
-                if uploaded_file.type == "application/pdf":
-                    text = extract_text_from_pdf(uploaded_file)
-                else:
-                    text = extract_text_from_docx(uploaded_file)
-            
-            if not text.strip():
-                st.error("❌ Impossibile estrarre testo dal documento")
-                return
-            
-            # Estrai citazioni
-            with st.spinner("🔍 Ricerca citazioni nel documento..."):
-                citations = extract_citations(text)
-            
-            if not citations:
-                st.error("❌ Nessuna citazione trovata. Verifica che il documento contenga una bibliografia.")
+        start = st.button("🚀 Avvia Verifica Bibliografia", type="primary")
+        if start:
+            st.session_state['active_file'] = digest
+        # Ai rerun successivi (slider, checkbox...) si mostrano i risultati già calcolati
+        if st.session_state.get('active_file') != digest:
+            return
+        
+        # Estrai testo e citazioni (una sola volta per contenuto del file)
+        with st.spinner("📄 Estrazione citazioni dal documento..."):
+            text, citations = load_citations(digest, uploaded_file.name, content)
+        
+        if not text.strip() and not citations:
+            st.error("❌ Impossibile estrarre testo dal documento")
+            return
+        
+        if not citations:
+            st.error("❌ Nessuna citazione trovata. Verifica che il documento contenga una bibliografia.")
+            return
+        
+        st.success(f"✅ Trovate {len(citations)} citazioni!")
+        
+        # Mostra anteprima citazioni
+        with st.expander("👀 Anteprima Citazioni Estratte"):
+            for i, citation in enumerate(citations[:5]):
+                st.markdown(f"**{i+1}.** {citation.original_text[:100]}...")
+            if len(citations) > 5:
+                st.markdown(f"... e altre {len(citations)-5} citazioni")
+        
+        # Solo le citazioni non ancora verificate in questa sessione (o non raggiunte) vanno in rete
+        state = verification_state(digest, uploaded_file.name)
+        pending = pending_positions(state, len(citations))
+        if pending and start and state['job'] is None:
+            submit_pending(state, citations, pending, uploaded_file.name, budget)
+        if state['job'] is not None:
+            job_results = follow_job(state['job']['id'], show_progress, budget)
+            if job_results is None:
                 return
-            
-            st.success(f"✅ Trovate {len(citations)} citazioni!")
-            
-            # Limita citazioni se necessario
-            if len(citations) > max_citations:
-                citations = citations[:max_citations]
-                st.warning(f"⚠️ Analisi limitata alle prime {max_citations} citazioni")
-            
-            # Mostra anteprima citazioni
-            with st.expander("👀 Anteprima Citazioni Estratte"):
-                for i, citation in enumerate(citations[:5]):
-                    st.markdown(f"**{i+1}.** {citation.original_text[:100]}...")
-                if len(citations) > 5:
-                    st.markdown(f"... e altre {len(citations)-5} citazioni")
-            
-            # Verifica citazioni
-            st.header("🔍 Verifica in Corso...")
-            
-            # Progress bar
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            results = []
-            
-            for i, citation in enumerate(citations):
-                # Aggiorna progress
-                progress = (i + 1) / len(citations)
-                progress_bar.progress(progress)
-                status_text.text(f"Verifica citazione {i+1}/{len(citations)}...")
-                
-                if show_progress:
-                    with st.expander(f"🔍 Citazione {i+1} in corso...", expanded=False):
-                        st.text(citation.original_text[:100] + "...")
-                
-                # Verifica citazione
-                result = verify_citation(citation)
-                result['citation'] = citation
-                results.append(result)
-                
-                # Pausa per evitare sovraccarico API
-                time.sleep(1)
-            
-            # Completa progress
-            progress_bar.progress(1.0)
-            status_text.text("✅ Verifica completata!")
-            
-            # RISULTATI
-            st.header("📊 Risultati")
-            
-            # Calcola statistiche
-            total = len(results)
-            verified = sum(1 for r in results if r['status'] == 'verified')
-            errors = sum(1 for r in results if r['status'] == 'error')
-            not_found = sum(1 for r in results if r['status'] == 'not_found')
-            uncertain = sum(1 for r in results if r['status'] == 'uncertain')
-            
-            accuracy = (verified / total * 100) if total > 0 else 0
-            
-            # Metriche principali
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.metric("📚 Totali", total)
-            with col2:
-                st.metric("✅ Verificate", verified, f"{accuracy:.1f}%")
-            with col3:
-                st.metric("❌ Errori", errors)
-            with col4:
-                st.metric("❓ Non Trovate", not_found)
-            
-            # Grafico a torta
-            if total > 0:
-                fig_pie = px.pie(
-                    values=[verified, errors, not_found, uncertain],
-                    names=['Verificate', 'Errori', 'Non Trovate', 'Incerte'],
-                    title="Distribuzione Status Citazioni",
-                    color_discrete_map={
-                        'Verificate': '#38a169',
-                        'Errori': '#e53e3e', 
-                        'Non Trovate': '#d69e2e',
-                        'Incerte': '#805ad5'
-                    }
-                )
-                st.plotly_chart(fig_pie, use_container_width=True)
-            
-            # Lista problemi
-            problematic = [r for r in results if r['status'] != 'verified']
-            
-            if problematic:
-                st.subheader("🚨 Citazioni Problematiche")
-                
-                for i, result in enumerate(problematic):
-                    with st.expander(f"❌ Problema {i+1}: {result['citation'].original_text[:80]}..."):
-                        st.markdown(f"**Status:** {result['status']}")
-                        st.markdown(f"**Confidence Score:** {result['score']:.2f}")
-                        
-                        if result['errors']:
-                            st.markdown("**Errori:**")
-                            for error in result['errors']:
-                                st.markdown(f"- {error}")
-                        
-                        if result['best_match']:
-                            st.markdown("**Miglior match trovato:**")
-                            match = result['best_match']
-                            st.markdown(f"- **Titolo:** {match['title']}")
-                            st.markdown(f"- **Autori:** {', '.join(match['authors'])}")
-                            st.markdown(f"- **Anno:** {match['year']}")
-            else:
-                st.success("🎉 Tutte le citazioni sono state verificate correttamente!")
-            
-            # Download report
-            st.header("📥 Report")
-            
-            report_data = {
-                'metadata': {
-                    'filename': uploaded_file.name,
-                    'generated_at': datetime.now().isoformat(),
-                    'total_citations': total,
-                    'accuracy_percentage': accuracy
-                },
-                'summary': {
-                    'verified': verified,
-                    'errors': errors,
-                    'not_found': not_found,
-                    'uncertain': uncertain
-                },
-                'detailed_results': []
-            }
-            
-            for i, result in enumerate(results):
-                citation_data = {
-                    'id': i + 1,
-                    'original_text': result['citation'].original_text,
-                    'status': result['status'],
-                    'score': result['score'],
-                    'errors': result['errors']
-                }
-                
-                if result['best_match']:
-                    citation_data['best_match'] = result['best_match']
-                
-                report_data['detailed_results'].append(citation_data)
-            
-            # Bottone download
-            report_json = json.dumps(report_data, indent=2, ensure_ascii=False)
-            
-            st.download_button(
-                label="📊 Scarica Report Completo",
-                data=report_json,
-                file_name=f"bibliography_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
-            )
+            merge_job(state, job_results, uploaded_file.name)
+            pending = pending_positions(state, len(citations))
+        if pending:
+            st.info(f"ℹ️ {len(pending)} citazioni non ancora verificate: "
+                    f"premi \"Avvia Verifica\" per completare l'analisi")
+        
+        results = ordered_results(state, len(citations))
+        if results:
+            show_results(results, state['diff'], uploaded_file.name)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+"""
+Throughput benchmark for bibliography parsing.
+
+Compares the original one-line-per-citation parser with the segmenting
+parser in ``bibliocheck.parsing`` on a synthetic reference list whose
+entries wrap over several lines, as PDF extraction produces them.
+
+    python benchmarks/bench_parsing.py [--entries 5000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import textwrap
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bibliocheck.parsing import parse_citations  # noqa: E402
+
+SURNAMES = ["Smith", "Rossi", "Bianchi", "LeCun", "Nguyen", "Garcia", "Müller", "Kowalski"]
+WORDS = ("deep learning verification bibliographic reference neural network model "
+         "analysis large scale citation graph retrieval evaluation method").split()
+
+
+def synthetic_bibliography(entries: int, width: int = 80, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = ["References"]
+    for _ in range(entries):
+        authors = ", ".join(
+            f"{rng.choice(SURNAMES)}, {rng.choice('ABCDEFGHJKLMNPRST')}." for _ in range(rng.randint(1, 4))
+        )
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize()
+        entry = (f"{authors} ({rng.randint(1980, 2024)}). {title}. Journal of "
+                 f"{rng.choice(WORDS).capitalize()}, {rng.randint(1, 80)}({rng.randint(1, 12)}), "
+                 f"{rng.randint(1, 300)}-{rng.randint(301, 600)}. "
+                 f"https://doi.org/10.{rng.randint(1000, 9999)}/x{rng.randint(10000, 99999)}")
+        lines.extend(textwrap.wrap(entry, width))
+    return "\n".join(lines)
+
+
+def legacy_parse_citations(bib_section):
+    """The original line-based parser, kept here only as the baseline."""
+    citations = []
+    for line in bib_section.split('\n'):
+        line = line.strip()
+        if len(line) > 30 and any(char.isdigit() for char in line) and '.' in line:
+            year_match = re.search(r'\b(19|20)\d{2}\b', line)
+            doi_match = re.search(r'10\.\d+/[^\s]+', line)
+            author_match = re.search(r'^([A-Z][a-z]+(?:,\s[A-Z]\.?)*)', line)
+            title = None
+            for pattern in [r'"([^"]+)"', r'\.?\s([A-Z][^.]+)\.']:
+                title_match = re.search(pattern, line)
+                if title_match and len(title_match.group(1)) > 10:
+                    title = title_match.group(1).strip()
+                    break
+            citations.append((line, year_match, doi_match, author_match, title))
+    return citations
+
+
+def bench(name, func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed = func(text)
+        best = min(best, time.perf_counter() - start)
+    return name, len(parsed), best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_bibliography(args.entries)
+    lines = text.count("\n") + 1
+    print(f"{args.entries} references over {lines} lines ({len(text) / 1e6:.1f} MB)")
+    print(f"{'parser':<12}{'citations':>10}{'time (ms)':>12}{'refs/s':>12}")
+    for name, func in (("legacy", legacy_parse_citations), ("segmenter", parse_citations)):
+        name, count, elapsed = bench(name, func, text, args.repeat)
+        print(f"{name:<12}{count:>10}{elapsed * 1000:>12.1f}{args.entries / elapsed:>12.0f}")
+    print("legacy turns each wrapped line into its own citation (and CrossRef query);")
+    print("the segmenter should report exactly the number of references.")
+
+
+if __name__ == "__main__":
+    main()
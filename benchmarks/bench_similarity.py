@@ -0,0 +1,100 @@
+"""
+Micro-benchmark for citation x candidate similarity scoring.
+
+Compares the original per-pair ``calculate_similarity`` (fuzzywuzzy, one
+call per pair, strings lowercased on every call) with the vectorized
+``score_matrix`` in ``bibliocheck.matching``.
+
+    python benchmarks/bench_similarity.py [--citations 200] [--candidates 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from bibliocheck.matching import FieldSet, _score_matrix_python, score_matrix  # noqa: E402
+from bibliocheck.models import Citation  # noqa: E402
+
+SURNAMES = ["Smith", "Rossi", "Bianchi", "LeCun", "Nguyen", "Garcia", "Müller", "Kowalski"]
+WORDS = ("deep learning verification bibliographic reference neural network model "
+         "analysis large scale citation graph retrieval evaluation method").split()
+
+
+def legacy_calculate_similarity(citation, result):
+    """The original scoring function, kept here only as the baseline."""
+    from fuzzywuzzy import fuzz
+
+    score = 0
+    factors = 0
+    if citation.title and result['title']:
+        score += fuzz.token_set_ratio(citation.title.lower(), result['title'].lower()) / 100 * 0.5
+        factors += 0.5
+    if citation.year and result['year']:
+        if citation.year == result['year']:
+            score += 0.3
+        elif abs(int(citation.year) - int(result['year'])) <= 1:
+            score += 0.2
+        factors += 0.3
+    if citation.authors and result['authors']:
+        author_sim = 0
+        for c_author in citation.authors:
+            for r_author in result['authors']:
+                author_sim = max(author_sim, fuzz.ratio(c_author.lower(), r_author.lower()) / 100)
+        score += author_sim * 0.2
+        factors += 0.2
+    return score / factors if factors > 0 else 0
+
+
+def synthetic(count, rng):
+    items = []
+    for _ in range(count):
+        items.append({
+            'title': " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 12))).capitalize(),
+            'authors': [f"{rng.choice(SURNAMES)}, {rng.choice('ABCDEFGH')}." for _ in range(rng.randint(1, 5))],
+            'year': str(rng.randint(1990, 2024)),
+            'doi': f"10.{rng.randint(1000, 9999)}/x{rng.randint(1, 500)}",
+        })
+    return items
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--citations", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    citations = [Citation(original_text=d['title'], **d) for d in synthetic(args.citations, rng)]
+    candidates = synthetic(args.candidates, rng)
+    pairs = args.citations * args.candidates
+    print(f"{args.citations} citations x {args.candidates} candidates = {pairs} pairs")
+
+    timings = {
+        "legacy (per pair)": lambda: [[legacy_calculate_similarity(c, r) for r in candidates] for c in citations],
+        "python fallback": lambda: _score_matrix_python(FieldSet(citations), FieldSet(candidates)),
+        "score_matrix": lambda: score_matrix(citations, candidates),
+    }
+    baseline = None
+    for name, func in timings.items():
+        try:
+            elapsed = timed(func)
+        except ImportError as e:
+            print(f"{name:<20} skipped ({e})")
+            continue
+        baseline = baseline or elapsed
+        print(f"{name:<20}{elapsed * 1000:>10.1f} ms{pairs / elapsed:>14.0f} pairs/s"
+              f"{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Bibliography Checker core library.
+
+The extraction, parsing and verification pipeline, usable without the
+Streamlit UI. Public names are resolved lazily, so ``import bibliocheck``
+costs nothing until a stage is actually used::
+
+    from bibliocheck import extract_bibliography, parse_citations, verify_citations
+
+    citations = parse_citations(extract_bibliography("thesis.pdf"))
+    results = verify_citations(citations)
+"""
+
+import importlib
+
+__version__ = "1.0.0"
+
+_EXPORTS = {
+    'Citation': 'bibliocheck.models',
+    'extract_text': 'bibliocheck.extraction',
+    'extract_text_from_pdf': 'bibliocheck.extraction',
+    'extract_text_from_docx': 'bibliocheck.extraction',
+    'extract_bibliography': 'bibliocheck.extraction',
+    'iter_pdf_pages': 'bibliocheck.extraction',
+    'find_bibliography_section': 'bibliocheck.parsing',
+    'extract_citations': 'bibliocheck.parsing',
+    'parse_citations': 'bibliocheck.parsing',
+    'calculate_similarity': 'bibliocheck.matching',
+    'VerificationEngine': 'bibliocheck.engine',
+    'verify_citation': 'bibliocheck.engine',
+    'verify_citations': 'bibliocheck.engine',
+    'build_report': 'bibliocheck.report',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'bibliocheck' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
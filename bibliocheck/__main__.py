@@ -0,0 +1,5 @@
+import sys
+
+from bibliocheck.cli import main
+
+sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Multi-document batch processing.
+
+Text extraction and citation parsing are CPU bound, so they run in a
+process pool across all cores. Verification of every document's citations
+then goes through a single engine run: one shared, rate-limited queue
+instead of one per document. The outcome is a report per document plus a
+roll-up over the whole batch.
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import config
+from bibliocheck.history import compare_with_last_run, get_verdict_store
+from bibliocheck.report import STATUSES, build_report
+
+# A path on disk, or an in-memory upload as (filename, content bytes)
+DocumentSource = Union[str, Tuple[str, bytes]]
+
+
+class ParsedDocument:
+    """Citations parsed from one document, or the reason parsing failed."""
+
+    def __init__(self, filename, citations=None, error=None):
+        self.filename = filename
+        self.citations = citations or []
+        self.error = error
+
+
+def collect_documents(paths: Iterable[str]) -> List[str]:
+    """Expand directories (recursively) into the supported documents they contain."""
+    documents = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in config.SUPPORTED_FORMATS:
+                        documents.append(os.path.join(root, name))
+        else:
+            documents.append(path)
+    return documents
+
+
+def document_name(filename: str) -> str:
+    """Name a document is reported and its revision history kept under.
+
+    A path relative to the working directory (absolute when outside it),
+    so same-named files in different folders stay apart; an upload's
+    bare filename is kept as it is.
+    """
+    try:
+        relative = os.path.relpath(filename)
+    except ValueError:
+        # Another drive on Windows
+        relative = os.path.abspath(filename)
+    if relative.split(os.sep)[0] == os.pardir:
+        relative = os.path.abspath(filename)
+    return relative.replace(os.sep, '/')
+
+
+def parse_document(source: DocumentSource) -> ParsedDocument:
+    """Extract text and citations from one document (runs in a worker process)."""
+    from bibliocheck.extraction import extract_document
+    from bibliocheck.parsing import merge_field_citations
+
+    if isinstance(source, tuple):
+        filename, content = source
+        stream = io.BytesIO(content)
+    else:
+        filename, stream = source, source
+
+    try:
+        text, citations = extract_document(stream, filename=filename)
+    except ValueError as e:
+        return ParsedDocument(filename, error=str(e))
+    if not text.strip() and not citations:
+        return ParsedDocument(filename, error="Impossibile estrarre testo dal documento")
+
+    # Reference-manager citations are exact; hand-typed references are parsed from the text
+    citations = merge_field_citations(citations, text)
+    if not citations:
+        return ParsedDocument(filename, error="Nessuna citazione trovata")
+    return ParsedDocument(filename, citations)
+
+
+def parse_documents(sources: List[DocumentSource],
+                    max_workers: Optional[int] = None) -> List[ParsedDocument]:
+    """Parse documents in a process pool, preserving input order."""
+    if len(sources) <= 1 or max_workers == 1:
+        return [parse_document(source) for source in sources]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(parse_document, sources))
+
+
+def verify_documents(documents: List[ParsedDocument], max_citations: Optional[int] = None,
+                     on_result=None, budget: Optional[float] = None) -> List[List[Dict]]:
+    """Verify the citations of every document in one shared engine run.
+
+    ``on_result(index, result)`` is called with the position of the result
+    across the whole batch. ``budget`` is in seconds per document (the
+    shared run gets that much for each one), ``None`` for no limit. With
+    ``max_citations``, the citations of a document past that many are not
+    looked up but still reported, as ``'unverified'``. Returns one result
+    list per document.
+    """
+    from bibliocheck.engine import unverified_result, verify_citations
+
+    batches = [doc.citations[:max_citations] for doc in documents]
+    flat = [citation for batch in batches for citation in batch]
+    if budget is not None:
+        budget *= max(1, len(documents))
+    results = verify_citations(flat, on_result=on_result, budget=budget)
+
+    per_document = []
+    offset = 0
+    for doc, batch in zip(documents, batches):
+        doc_results = results[offset:offset + len(batch)]
+        for citation in doc.citations[len(batch):]:
+            result = unverified_result(f"Non verificata: oltre il limite di {max_citations} "
+                                       f"citazioni per documento")
+            result['citation'] = citation
+            doc_results.append(result)
+        per_document.append(doc_results)
+        offset += len(batch)
+    return per_document
+
+
+def build_rollup(reports: List[Dict], failed: List[ParsedDocument]) -> Dict:
+    """Aggregate per-document reports into batch-wide totals."""
+    totals = {status: 0 for status in STATUSES}
+    per_document = []
+    for report in reports:
+        for status, count in report['summary'].items():
+            totals[status] += count
+        per_document.append({
+            'filename': report['metadata']['filename'],
+            'total_citations': report['metadata']['total_citations'],
+            'accuracy_percentage': report['metadata']['accuracy_percentage'],
+            **report['summary']
+        })
+
+    total = sum(totals.values())
+    return {
+        'documents': len(reports) + len(failed),
+        'processed_documents': len(reports),
+        'failed_documents': [{'filename': document_name(doc.filename), 'error': doc.error}
+                             for doc in failed],
+        'total_citations': total,
+        'accuracy_percentage': (totals['verified'] / total * 100) if total > 0 else 0,
+        'summary': totals,
+        'per_document': per_document
+    }
+
+
+def run_batch(sources: List[DocumentSource], max_citations: Optional[int] = None,
+              max_workers: Optional[int] = None, on_result=None,
+              budget: Optional[float] = None) -> Dict:
+    """Parse, verify and report on many documents (``budget`` in seconds per document).
+
+    Returns ``{'reports': [...], 'rollup': {...}}`` with one report per
+    successfully parsed document.
+    """
+    documents = parse_documents(sources, max_workers=max_workers)
+    parsed = [doc for doc in documents if doc.error is None]
+    failed = [doc for doc in documents if doc.error is not None]
+
+    results = verify_documents(parsed, max_citations=max_citations, on_result=on_result,
+                               budget=budget)
+    store = get_verdict_store()
+    reports = []
+    for doc, doc_results in zip(parsed, results):
+        filename = document_name(doc.filename)
+        diff = compare_with_last_run(store, filename, doc_results)
+        reports.append(build_report(doc_results, filename, diff))
+    return {'reports': reports, 'rollup': build_rollup(reports, failed)}
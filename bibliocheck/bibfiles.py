@@ -0,0 +1,383 @@
+"""
+Reference-manager exports: BibTeX (``.bib``), RIS (``.ris``) and CSL-JSON (``.json``).
+
+Each format is parsed incrementally, one entry at a time, from a line
+(or chunk) iterator, so exports with tens of thousands of entries never
+sit in memory whole. Entries are mapped to CSL-JSON items and turned
+into citations by ``bibliocheck.csl``, like reference-manager fields in
+a DOCX.
+"""
+
+import io
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from bibliocheck.csl import citation_from_csl
+from bibliocheck.models import Citation
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_FORMATS = ('.bib', '.ris', '.json')
+
+# =============================================================================
+# BibTeX
+# =============================================================================
+
+BIBTEX_ENTRY_START = re.compile(r'@\s*(\w+)\s*[{(]')
+# An entry starting a line while another is still open: the open one is malformed
+BIBTEX_ENTRY_LINE = re.compile(r'\s*@\s*\w+\s*[{(]')
+BIBTEX_FIELD = re.compile(r'\s*,?\s*([\w\-:]+)\s*=\s*')
+# \'e, \'{e}, {\'e}: accent commands mapped to combining characters
+LATEX_ACCENTS = {
+    "'": '\u0301', '`': '\u0300', '^': '\u0302', '"': '\u0308', '~': '\u0303',
+    '=': '\u0304', '.': '\u0307', 'c': '\u0327', 'v': '\u030c', 'u': '\u0306', 'H': '\u030b',
+}
+LATEX_ACCENT = re.compile(r'\\([\'`^"~=.]|[cvuH](?=[\s{]))\s*\{?([A-Za-z])\}?')
+LATEX_SYMBOLS = {
+    r'\ss': 'ß', r'\o': 'ø', r'\O': 'Ø', r'\aa': 'å', r'\AA': 'Å', r'\ae': 'æ', r'\AE': 'Æ',
+    r'\l': 'ł', r'\L': 'Ł', r'\&': '&', r'\%': '%', r'\_': '_', r'\$': '$', '--': '–', '~': ' ',
+}
+LATEX_SYMBOL = re.compile('|'.join(re.escape(s) for s in sorted(LATEX_SYMBOLS, key=len, reverse=True)))
+LATEX_COMMAND = re.compile(r'\\[a-zA-Z]+\*?\s*')
+
+BIBTEX_TYPES = {
+    'article': 'article-journal', 'inproceedings': 'paper-conference',
+    'conference': 'paper-conference', 'book': 'book', 'incollection': 'chapter',
+    'inbook': 'chapter', 'phdthesis': 'thesis', 'mastersthesis': 'thesis',
+    'techreport': 'report', 'misc': 'article',
+}
+
+
+def latex_to_text(value: str) -> str:
+    """Turn LaTeX markup in a BibTeX value into plain Unicode text."""
+    value = LATEX_ACCENT.sub(lambda m: m.group(2) + LATEX_ACCENTS[m.group(1)], value)
+    value = LATEX_SYMBOL.sub(lambda m: LATEX_SYMBOLS[m.group()], value)
+    value = LATEX_COMMAND.sub('', value)
+    value = value.replace('{', '').replace('}', '')
+    return unicodedata.normalize('NFC', ' '.join(value.split()))
+
+
+def _read_value(body: str, pos: int, strings: Dict[str, str]):
+    """Parse one field value (braced, quoted, number or macro, ``#``-joined)."""
+    parts = []
+    while pos < len(body):
+        char = body[pos]
+        if char == '{':
+            depth, start = 0, pos
+            while pos < len(body):
+                if body[pos] == '{':
+                    depth += 1
+                elif body[pos] == '}':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                pos += 1
+            parts.append(body[start + 1:pos])
+            pos += 1
+        elif char == '"':
+            end = pos + 1
+            depth = 0
+            while end < len(body) and not (body[end] == '"' and depth == 0
+                                           and body[end - 1] != '\\'):
+                depth += {'{': 1, '}': -1}.get(body[end], 0)
+                end += 1
+            parts.append(body[pos + 1:end])
+            pos = end + 1
+        else:
+            match = re.match(r'[\w\-:.]+', body[pos:])
+            if not match:
+                break
+            token = match.group()
+            parts.append(strings.get(token.lower(), token))
+            pos += len(token)
+        # Concatenation: "a" # macro # {b}
+        rest = re.match(r'\s*#\s*', body[pos:])
+        if not rest:
+            break
+        pos += rest.end()
+    return ''.join(parts), pos
+
+
+def parse_bibtex_fields(body: str, strings: Dict[str, str]) -> Dict[str, str]:
+    """Fields of one entry body (after the citation key) as ``{name: value}``."""
+    fields = {}
+    pos = 0
+    while True:
+        match = BIBTEX_FIELD.match(body, pos)
+        if not match:
+            break
+        value, pos = _read_value(body, match.end(), strings)
+        fields[match.group(1).lower()] = value
+    return fields
+
+
+def bibtex_names(value: str) -> List[Dict]:
+    """CSL names from a BibTeX name list ("Last, First and First Last")."""
+    names = []
+    for name in re.split(r'\s+and\s+', latex_to_text(value)):
+        name = name.strip()
+        if not name or name.lower() == 'others':
+            continue
+        if ',' in name:
+            family, _, given = name.partition(',')
+            names.append({'family': family.strip(), 'given': given.strip()})
+        elif ' ' in name:
+            given, _, family = name.rpartition(' ')
+            names.append({'family': family, 'given': given})
+        else:
+            names.append({'family': name})
+    return names
+
+
+def bibtex_to_csl(entry_type: str, fields: Dict[str, str]) -> Dict:
+    item = {'type': BIBTEX_TYPES.get(entry_type, 'article')}
+    if 'title' in fields:
+        item['title'] = latex_to_text(fields['title'])
+    if 'author' in fields:
+        item['author'] = bibtex_names(fields['author'])
+    if 'editor' in fields:
+        item['editor'] = bibtex_names(fields['editor'])
+    year = re.search(r'\d{4}', fields.get('year') or fields.get('date') or '')
+    if year:
+        item['issued'] = {'date-parts': [[int(year.group())]]}
+    container = fields.get('journal') or fields.get('journaltitle') or fields.get('booktitle')
+    if container:
+        item['container-title'] = latex_to_text(container)
+    for source, target in (('volume', 'volume'), ('number', 'issue'), ('pages', 'page'),
+                           ('publisher', 'publisher'), ('doi', 'DOI')):
+        if fields.get(source):
+            item[target] = latex_to_text(fields[source])
+    return item
+
+
+def iter_bibtex_entries(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the raw text of each ``@type{...}`` or ``@type(...)`` entry.
+
+    Only the entry's own delimiter pair closes it; parentheses inside
+    values and anything inside ``{...}`` or ``"..."`` values are skipped.
+    An entry may span lines, and several may share one. An entry still
+    open when another starts a line is dropped as malformed, so one
+    unbalanced brace does not swallow the rest of the file.
+    """
+    parts = None
+    for line in lines:
+        if parts is not None and BIBTEX_ENTRY_LINE.match(line):
+            logger.warning("Voce BibTeX non chiusa, ignorata: %s", ''.join(parts)[:80].strip())
+            parts = None
+        pos = 0
+        while True:
+            if parts is None:
+                match = BIBTEX_ENTRY_START.search(line, pos)
+                if match is None:
+                    break
+                parts, start, pos = [], match.start(), match.end()
+                closing = ')' if match.group().endswith('(') else '}'
+                depth, quoted = 0, False
+            else:
+                start = pos
+            end = None
+            previous = ''
+            for i in range(pos, len(line)):
+                char = line[i]
+                if quoted:
+                    if char == '"' and depth == 0 and previous != '\\':
+                        quoted = False
+                    elif char == '{':
+                        depth += 1
+                    elif char == '}' and depth > 0:
+                        depth -= 1
+                elif depth:
+                    if char == '{':
+                        depth += 1
+                    elif char == '}':
+                        depth -= 1
+                elif char == closing:
+                    end = i
+                    break
+                elif char == '{':
+                    depth = 1
+                elif char == '"':
+                    quoted = True
+                previous = char
+            if end is None:
+                parts.append(line[start:])
+                break
+            parts.append(line[start:end + 1])
+            yield ''.join(parts)
+            # Keep scanning the line: another entry may follow
+            parts, pos = None, end + 1
+    if parts is not None:
+        logger.warning("Voce BibTeX non chiusa a fine file, ignorata: %s",
+                       ''.join(parts)[:80].strip())
+
+
+def iter_bibtex(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yield CSL items from BibTeX text, one entry at a time.
+
+    ``@string`` macros are expanded; ``@comment`` and ``@preamble`` are
+    skipped.
+    """
+    strings = {}
+    for entry in iter_bibtex_entries(lines):
+        match = BIBTEX_ENTRY_START.match(entry)
+        entry_type = match.group(1).lower()
+        body = entry[match.end():-1]
+        if entry_type == 'string':
+            strings.update((k, latex_to_text(v)) for k, v in parse_bibtex_fields(body, strings).items())
+        elif entry_type not in ('comment', 'preamble'):
+            # Skip the citation key
+            _, _, body = body.partition(',')
+            yield bibtex_to_csl(entry_type, parse_bibtex_fields(body, strings))
+
+
+# =============================================================================
+# RIS
+# =============================================================================
+
+RIS_LINE = re.compile(r'^([A-Z][A-Z0-9])  -\s?(.*)$')
+RIS_TYPES = {
+    'JOUR': 'article-journal', 'CONF': 'paper-conference', 'CPAPER': 'paper-conference',
+    'BOOK': 'book', 'CHAP': 'chapter', 'THES': 'thesis', 'RPRT': 'report',
+}
+
+
+def ris_to_csl(tags: Dict[str, List[str]]) -> Dict:
+    def first(*names) -> Optional[str]:
+        for name in names:
+            if tags.get(name):
+                return tags[name][0]
+        return None
+
+    item = {'type': RIS_TYPES.get(first('TY') or '', 'article')}
+    title = first('TI', 'T1', 'CT')
+    if title:
+        item['title'] = title
+    authors = tags.get('AU', []) + tags.get('A1', [])
+    if authors:
+        names = []
+        for author in authors:
+            family, _, given = author.partition(',')
+            names.append({'family': family.strip(), 'given': given.strip()} if given
+                         else {'family': family.strip()})
+        item['author'] = names
+    year = re.search(r'\d{4}', first('PY', 'Y1', 'DA') or '')
+    if year:
+        item['issued'] = {'date-parts': [[int(year.group())]]}
+    container = first('JO', 'JF', 'T2', 'JA', 'BT')
+    if container:
+        item['container-title'] = container
+    for source, target in (('VL', 'volume'), ('IS', 'issue'), ('PB', 'publisher'), ('DO', 'DOI')):
+        value = first(source)
+        if value:
+            item[target] = value
+    start, end = first('SP'), first('EP')
+    if start:
+        item['page'] = f"{start}-{end}" if end else start
+    return item
+
+
+def iter_ris(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yield CSL items from RIS text, one ``TY``...``ER`` record at a time."""
+    tags: Dict[str, List[str]] = {}
+    last = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        match = RIS_LINE.match(line.lstrip('\ufeff'))
+        if not match:
+            # Continuation of a long value
+            if last and line.strip():
+                tags[last][-1] += ' ' + line.strip()
+            continue
+        tag, value = match.groups()
+        if tag == 'ER':
+            if tags:
+                yield ris_to_csl(tags)
+            tags, last = {}, None
+            continue
+        tags.setdefault(tag, []).append(value.strip())
+        last = tag
+    if tags:
+        yield ris_to_csl(tags)
+
+
+# =============================================================================
+# CSL-JSON
+# =============================================================================
+
+def iter_csl_json(chunks: Iterable[str]) -> Iterator[Dict]:
+    """Yield the items of a CSL-JSON array, decoding one object at a time.
+
+    Raises ``ValueError`` on a malformed or truncated file, once the input
+    ends with an item that never decoded.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            stripped = buffer.lstrip()
+            if not started:
+                if not stripped:
+                    break
+                if stripped[0] == '{':
+                    # A single item rather than an array
+                    started = True
+                elif stripped[0] == '[':
+                    stripped = stripped[1:]
+                    started = True
+                else:
+                    raise ValueError("CSL-JSON non valido")
+            stripped = stripped.lstrip().lstrip(',').lstrip()
+            if not stripped or stripped[0] == ']':
+                buffer = stripped
+                break
+            try:
+                item, end = decoder.raw_decode(stripped)
+            except ValueError:
+                # Object not complete yet: read more
+                buffer = stripped
+                break
+            buffer = stripped[end:]
+            if isinstance(item, dict):
+                yield item
+    if buffer.strip() not in ('', ']'):
+        raise ValueError("CSL-JSON non valido")
+
+
+def _chunks(stream, size: int = 1 << 16) -> Iterator[str]:
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_reference_file(source, filename=None) -> List[Citation]:
+    """Citations of a ``.bib``, ``.ris`` or CSL-JSON file (path or binary file object)."""
+    name = filename or getattr(source, 'name', None) or str(source)
+    extension = os.path.splitext(name)[1].lower()
+    if isinstance(source, (str, os.PathLike)):
+        stream = open(source, 'rb')
+    else:
+        stream = source
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace')
+    try:
+        if extension == '.bib':
+            items = iter_bibtex(text)
+        elif extension == '.ris':
+            items = iter_ris(text)
+        elif extension == '.json':
+            items = iter_csl_json(_chunks(text))
+        else:
+            raise ValueError(f"Formato non supportato: {extension or name}")
+        return [citation_from_csl(item) for item in items if item.get('title')]
+    finally:
+        # Closing the wrapper would close an uploaded stream too
+        text.detach()
+        if stream is not source:
+            stream.close()
@@ -0,0 +1,145 @@
+"""
+Persistent lookup cache.
+
+Database responses are stored in a SQLite file keyed by ``(namespace,
+normalized key)`` - the namespace is the database id - so repeated checks
+of the same references cost neither network latency nor API quota.
+Entries expire after ``CACHE_TTL_HOURS`` (expired ones remain available as
+a stale fallback until purged) and the least recently used ones are
+evicted once the cache holds more than ``CACHE_MAX_SIZE`` entries.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+import config
+
+_NON_WORD = re.compile(r'[^\w\s]')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_key(text: str) -> str:
+    """Normalize a query so trivially different spellings share an entry."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _NON_WORD.sub(' ', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+class LookupCache:
+    """SQLite-backed cache with TTL expiry, LRU eviction and hit counters."""
+
+    def __init__(self, path: str = config.CACHE_PATH,
+                 ttl_hours: float = config.CACHE_TTL_HOURS,
+                 max_size: int = config.CACHE_MAX_SIZE):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def get(self, namespace: str, key: str, stale: bool = False) -> Optional[Any]:
+        """Return the cached value, or ``None`` on a miss or expired entry.
+
+        Expired entries stay stored until evicted or purged: with ``stale``
+        they are still returned, as a fallback when the database is down.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or (now - row[1] > self.ttl and not stale):
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, payload, now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        excess = count - self.max_size
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE rowid IN"
+                " (SELECT rowid FROM entries ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry and return how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': size,
+            'max_size': self.max_size,
+        }
+
+
+_cache: Optional[LookupCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LookupCache]:
+    """Return the process-wide cache, or ``None`` when caching is disabled."""
+    global _cache
+    if not config.CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LookupCache()
+        return _cache
@@ -0,0 +1,150 @@
+"""
+Command-line interface: ``bibliocheck FILE|DIR [FILE|DIR ...]``.
+
+Reads PDF/DOCX documents, verifies their bibliographies and writes one
+JSON report per document - to stdout for a single file, or into the
+``--output`` directory together with a ``rollup.json`` for the batch.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+from collections import Counter
+from typing import Dict, List, Optional
+
+import config
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bibliocheck",
+        description="Verifica automatica delle bibliografie accademiche.",
+    )
+    parser.add_argument("files", nargs="+", metavar="FILE",
+                        help="documenti PDF o DOCX, file .bib/.ris/CSL-JSON da verificare, "
+                             "o cartelle che li contengono")
+    parser.add_argument("-o", "--output", metavar="DIR",
+                        help="cartella in cui scrivere un report JSON per documento "
+                             "(default: stdout, solo con un singolo file)")
+    parser.add_argument("--max-citations", type=int, default=None,
+                        help="numero massimo di citazioni verificate per documento; le altre "
+                             "sono riportate come 'unverified' (default: tutte)")
+    parser.add_argument("--budget", type=float, default=0, metavar="SECONDI",
+                        help="tempo massimo della verifica per documento; le citazioni non "
+                             "raggiunte sono segnate 'unverified' (default: 0 = nessun limite)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="processi per l'estrazione del testo (default: uno per core)")
+    parser.add_argument("--extract-only", action="store_true",
+                        help="estrae le citazioni senza verificarle")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log dettagliato")
+    return parser
+
+
+def _stem(name: str) -> str:
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def report_paths(output_dir: str, names: List[str]) -> Dict[str, str]:
+    """Report file of each document name: ``<stem>.bibliocheck.json``.
+
+    Documents sharing a stem (``a/tesi.pdf``, ``b/tesi.pdf``) get a short
+    hash of their name appended, so no report overwrites another.
+    """
+    stems = Counter(_stem(name) for name in set(names))
+    paths = {}
+    for name in names:
+        stem = _stem(name)
+        if stems[stem] > 1:
+            stem += "-" + hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+        paths[name] = os.path.join(output_dir, f"{stem}.bibliocheck.json")
+    return paths
+
+
+def write_json(data, path: Optional[str]) -> None:
+    payload = json.dumps(data, indent=2, ensure_ascii=False)
+    if path is None:
+        sys.stdout.write(payload + "\n")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from bibliocheck.batch import collect_documents, document_name
+
+    paths = collect_documents(args.files)
+    if not paths:
+        parser.error("nessun documento o file di riferimenti supportato trovato")
+    if args.output is None and len(paths) > 1:
+        parser.error("con più documenti serve --output")
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else getattr(logging, config.LOG_LEVEL),
+        format=config.LOG_FORMAT,
+    )
+
+    outputs = {}
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        outputs = report_paths(args.output, [document_name(path) for path in paths])
+
+    def destination(name):
+        return outputs.get(name)
+
+    if args.extract_only:
+        return extract_only(paths, args, destination)
+
+    from bibliocheck.batch import run_batch
+
+    batch = run_batch(paths, max_citations=args.max_citations, max_workers=args.workers,
+                      budget=args.budget or None)
+    rollup = batch['rollup']
+    for failed in rollup['failed_documents']:
+        logging.error("%s: %s", failed['filename'], failed['error'])
+
+    for report in batch['reports']:
+        summary = report['summary']
+        logging.info(
+            "%s: %d citazioni, %d verificate, %d errori, %d non trovate, %d non raggiunte",
+            report['metadata']['filename'], report['metadata']['total_citations'],
+            summary['verified'], summary['error'], summary['not_found'], summary['unverified'],
+        )
+        write_json(report, destination(report['metadata']['filename']))
+
+    if args.output and len(paths) > 1:
+        write_json(rollup, os.path.join(args.output, "rollup.json"))
+        logging.info(
+            "Totale: %d documenti, %d citazioni, accuratezza %.1f%%",
+            rollup['documents'], rollup['total_citations'], rollup['accuracy_percentage'],
+        )
+
+    return 1 if rollup['failed_documents'] else 0
+
+
+def extract_only(paths: List[str], args, destination) -> int:
+    """Write the parsed citations of each document without verifying them."""
+    from bibliocheck.batch import document_name, parse_documents
+
+    failures = 0
+    for document in parse_documents(paths, max_workers=args.workers):
+        name = document_name(document.filename)
+        if document.error is not None:
+            logging.error("%s: %s", name, document.error)
+            failures += 1
+            continue
+        write_json({
+            'filename': name,
+            'citations': [c.to_dict() for c in document.citations[:args.max_citations]]
+        }, destination(name))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Single-flight coalescing of identical lookups.
+
+Concurrent identical lookups - the same normalized query or DOI, from
+two citations of one document or from different UI sessions - are
+merged into one upstream request whose result is fanned out to every
+caller. Flights are process-wide and thread-safe: each verification run
+has its own event loop in its own thread, so waiters are woken through
+``concurrent.futures`` futures rather than loop-bound ones.
+
+If the caller doing the request is cancelled (a federated search stopped
+early, a losing hedge), its waiters are not failed: one of them takes
+over and makes the request itself.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class Abandoned(Exception):
+    """The request of a flight was cancelled before it finished."""
+
+
+class SingleFlight:
+    """Registry of lookups in flight, keyed by ``"<db_id>:<key>"``."""
+
+    def __init__(self):
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.deduplicated = 0
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """The flight for ``key`` and whether the caller leads it (must make the request)."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future, False
+            future = Future()
+            # A running future cannot be cancelled by a waiter
+            future.set_running_or_notify_cancel()
+            self._flights[key] = future
+            self.requests += 1
+            return future, True
+
+    def finish(self, key: str, future: Future, value: Any = None,
+               error: BaseException = None) -> None:
+        """Land a flight: wake its waiters with ``value`` or ``error``."""
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    async def do(self, key: str, fetch: Callable[[], Awaitable[Any]],
+                 private: Tuple[type, ...] = ()) -> Any:
+        """Await ``fetch()``, or the identical call already in flight.
+
+        Errors of the ``private`` types belong to the leader alone (e.g. its
+        own deadline ran out): the waiters are not failed with them but
+        take over the request, as when the leader is cancelled.
+        """
+        while True:
+            future, leader = self.claim(key)
+            if not leader:
+                try:
+                    return await wait(future)
+                except Abandoned:
+                    continue
+            try:
+                value = await fetch()
+            except asyncio.CancelledError:
+                self.finish(key, future, error=Abandoned())
+                raise
+            except BaseException as e:
+                self.finish(key, future, error=Abandoned() if isinstance(e, private) else e)
+                raise
+            self.finish(key, future, value)
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._flights)
+        total = self.requests + self.deduplicated
+        return {
+            'requests': self.requests,
+            'deduplicated': self.deduplicated,
+            'dedup_rate': self.deduplicated / total if total else 0.0,
+            'in_flight': in_flight,
+        }
+
+
+async def wait(future: Future) -> Any:
+    """Await a flight from any event loop.
+
+    Cancelling the waiter tries to cancel the flight's future too, which
+    fails because it is marked running, so the flight and its other
+    waiters are unaffected.
+    """
+    return await asyncio.wrap_future(future)
+
+
+_flights = SingleFlight()
+
+
+def get_flights() -> SingleFlight:
+    """Return the process-wide flight registry, shared by every session."""
+    return _flights
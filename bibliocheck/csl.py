@@ -0,0 +1,81 @@
+"""
+CSL-JSON items (the data model of Zotero, Mendeley and citeproc) as citations.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bibliocheck.models import Citation
+
+YEAR = re.compile(r'\b(?:1[5-9]|20)\d{2}\b')
+
+
+def csl_year(item: Dict) -> Optional[str]:
+    """Year of ``issued`` (``date-parts``, ``raw`` or ``literal``)."""
+    issued = item.get('issued') or {}
+    try:
+        year = issued['date-parts'][0][0]
+        if year:
+            return str(year)
+    except (KeyError, IndexError, TypeError):
+        pass
+    match = YEAR.search(str(issued.get('raw') or issued.get('literal') or ''))
+    return match.group() if match else None
+
+
+def csl_authors(item: Dict) -> List[str]:
+    """Authors (editors when there are none) as "Family, Given"."""
+    authors = []
+    for name in item.get('author') or item.get('editor') or []:
+        if name.get('family'):
+            authors.append(f"{name['family']}, {name['given']}" if name.get('given') else name['family'])
+        elif name.get('literal'):
+            authors.append(name['literal'])
+    return authors
+
+
+def _text(value) -> Optional[str]:
+    # Some exporters write lists where CSL expects strings
+    if isinstance(value, list):
+        value = value[0] if value else None
+    return ' '.join(str(value).split()) if value else None
+
+
+def format_reference(item: Dict) -> str:
+    """Render an item as an APA-like reference line, used as the citation text."""
+    parts = []
+    authors = csl_authors(item)
+    if authors:
+        parts.append('; '.join(authors))
+    year = csl_year(item)
+    parts.append(f"({year})." if year else "(n.d.).")
+    title = _text(item.get('title'))
+    if title:
+        parts.append(title.rstrip('.') + '.')
+    container = _text(item.get('container-title'))
+    if container:
+        details = container
+        if item.get('volume'):
+            details += f", {item['volume']}"
+            if item.get('issue'):
+                details += f"({item['issue']})"
+        if item.get('page'):
+            details += f", {item['page']}"
+        parts.append(details + '.')
+    elif item.get('publisher'):
+        parts.append(_text(item['publisher']) + '.')
+    doi = _text(item.get('DOI'))
+    if doi:
+        parts.append(f"https://doi.org/{doi}")
+    return ' '.join(parts)
+
+
+def citation_from_csl(item: Dict) -> Citation:
+    """Build a citation straight from structured CSL-JSON, without text parsing."""
+    return Citation(
+        original_text=format_reference(item),
+        authors=csl_authors(item),
+        year=csl_year(item),
+        title=_text(item.get('title')),
+        doi=_text(item.get('DOI'))
+    )
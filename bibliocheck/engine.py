@@ -0,0 +1,501 @@
+"""
+Asynchronous verification engine.
+
+Citations are verified concurrently over one pooled HTTP transport.
+Throughput is bounded by ``config.MAX_CONCURRENT_REQUESTS`` lookups in
+flight and by each database's token bucket, not by a fixed pause between
+citations.
+
+Searches are federated: the providers relevant to a citation are queried
+concurrently and the rest are cancelled as soon as one returns a match
+above ``SIMILARITY_THRESHOLDS["overall_match"]``. Only when none does is
+the search escalated to the remaining enabled providers.
+
+Every database call goes through ``bibliocheck.resilience``: a circuit
+breaker per database, a hedged duplicate once a call outlives the
+database's p95 latency, and a deadline derived from the run budget
+(``RUN_BUDGET_SECONDS``). A failed or skipped call falls back to a stale
+cache entry when there is one, and otherwise to the other providers.
+
+Within the budget, citations are verified in ``bibliocheck.scheduler``
+priority order and each call gets a fair share of the time left; the
+ones not reached in time come back ``'unverified'``.
+
+Records that verify a citation are kept in ``bibliocheck.resolved``, so a
+later citation of the same work with different punctuation, initials or
+abbreviations is answered without a request.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import config
+from bibliocheck import resilience
+from bibliocheck.cache import LookupCache, get_cache, normalize_key
+from bibliocheck.coalesce import Abandoned, get_flights, wait
+from bibliocheck.history import REUSABLE_STATUSES, VERDICT_NAMESPACE, get_verdict_store, stored_result
+from bibliocheck.index import LocalIndex, get_local_index
+from bibliocheck.matching import evaluate_candidates, evaluate_record
+from bibliocheck.providers import crossref, get_providers
+from bibliocheck.resolved import ResolvedIndex, get_resolved_index
+from bibliocheck.scheduler import schedule
+from bibliocheck.transport import Transport, TransportError
+
+logger = logging.getLogger(__name__)
+
+# Called as on_result(index, result) each time a citation finishes
+ResultCallback = Callable[[int, Dict], None]
+
+# How often a cancellable run checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.2
+
+
+def unavailable_result(error: Exception) -> Dict:
+    """Result for a citation that could not be checked because a database failed."""
+    return {
+        'status': 'unavailable',
+        'score': 0,
+        'best_match': None,
+        'errors': [f'Database non raggiungibile, riprovare più tardi ({error})']
+    }
+
+
+def unverified_result(
+        reason: str = 'Non verificata: tempo a disposizione esaurito, verificarla in una nuova esecuzione'
+) -> Dict:
+    """Result for a citation that was not checked: no time left in the run budget, by default."""
+    return {
+        'status': 'unverified',
+        'score': 0,
+        'best_match': None,
+        'errors': [reason]
+    }
+
+
+def doi_flight(doi: str) -> str:
+    """Single-flight key of a DOI resolution."""
+    return f"{crossref.DB_ID}:doi:{doi}"
+
+
+class VerificationEngine:
+    """Verify citations concurrently against the academic databases.
+
+    Use as an async context manager so the HTTP transport is opened and
+    closed around a run::
+
+        async with VerificationEngine() as engine:
+            results = await engine.verify_all(citations)
+    """
+
+    def __init__(self, max_concurrency: int = config.MAX_CONCURRENT_REQUESTS,
+                 timeout: float = config.REQUEST_TIMEOUT,
+                 cache: Optional[LookupCache] = None,
+                 index: Optional[LocalIndex] = None,
+                 providers: Optional[List] = None,
+                 verdicts: Optional[LookupCache] = None,
+                 resolved: Optional[ResolvedIndex] = None,
+                 budget: Optional[float] = config.RUN_BUDGET_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache = cache if cache is not None else get_cache()
+        self.index = index if index is not None else get_local_index()
+        self.verdicts = verdicts if verdicts is not None else get_verdict_store()
+        self.resolved = resolved if resolved is not None else get_resolved_index()
+        self.transport = Transport(timeout=timeout)
+        self.providers = providers if providers is not None else get_providers(self.transport)
+        self.budget = budget
+        # Monotonic time by which the current run must finish
+        self._deadline: Optional[float] = None
+        # Citations of the current run still waiting for a verdict
+        self._left = 0
+        self._semaphore = None
+        # DOI -> record, or None when the DOI is known not to resolve; kept for
+        # one run only (the lookup cache persists them across runs)
+        self._doi_records: Dict[str, Optional[Dict]] = {}
+
+    async def __aenter__(self):
+        await self.transport.open()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.transport.close()
+
+    def budget_spent(self) -> bool:
+        """Whether too little of the run budget is left to start another call."""
+        return (self._deadline is not None
+                and self._deadline - time.monotonic() < config.CALL_TIMEOUT_MIN)
+
+    def call_timeout(self) -> float:
+        """Deadline of the next database call.
+
+        Without a run budget it is ``CALL_TIMEOUT_MAX``. With one, each
+        citation still waiting gets a fair share of the time left (with
+        ``max_concurrency`` verified at once), so a few slow lookups cannot
+        use up the budget of the whole bibliography.
+        """
+        if self._deadline is None:
+            return config.CALL_TIMEOUT_MAX
+        remaining = self._deadline - time.monotonic()
+        if remaining < config.CALL_TIMEOUT_MIN:
+            raise resilience.DeadlineExceeded("tempo della verifica esaurito")
+        share = remaining * self.max_concurrency / max(1, self._left)
+        return min(config.CALL_TIMEOUT_MAX, remaining, max(config.CALL_TIMEOUT_MIN, share))
+
+    async def _call(self, db_id: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        return await resilience.call(db_id, fetch, self.call_timeout(), self._deadline)
+
+    async def _lookup(self, db_id: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Answer from the cache, or call ``fetch`` and store the result.
+
+        Identical lookups in flight anywhere in the process share one call.
+        Failed calls are never cached; they fall back to an expired entry
+        for the same key, if any, and raise ``TransportError`` otherwise.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(db_id, key)
+            if cached is not None:
+                return cached
+
+        async def fetch_and_store():
+            value = await self._call(db_id, fetch)
+            if self.cache is not None:
+                self.cache.set(db_id, key, value)
+            return value
+
+        try:
+            # Our deadline is a share of our budget: other runs waiting on us retry with theirs
+            return await get_flights().do(f"{db_id}:{key}", fetch_and_store,
+                                          private=(resilience.DeadlineExceeded,))
+        except TransportError as e:
+            stale = self.cache.get(db_id, key, stale=True) if self.cache is not None else None
+            if stale is None:
+                raise
+            logger.info("%s - uso la risposta in cache scaduta", e)
+            return stale
+
+    async def search_provider(self, provider, citation, max_results: int = 3) -> List[Dict]:
+        """Search one provider; raises ``TransportError`` if it cannot be reached."""
+        key = f"search:{max_results}:{normalize_key(provider.query(citation))}"
+        return await self._lookup(
+            provider.db_id, key, lambda: provider.search(citation, max_results)
+        )
+
+    def plan_providers(self, citation):
+        """Split the providers into those asked first and those kept for escalation."""
+        first = [p for p in self.providers if p.is_relevant(citation)]
+        if not first:
+            first = self.providers[:1]
+        return first, [p for p in self.providers if p not in first]
+
+    async def _fan_out(self, citation, providers: List, best: Optional[Dict],
+                       failures: List[TransportError]) -> Optional[Dict]:
+        """Query ``providers`` concurrently, stopping at the first confident match.
+
+        Returns the best evaluated result so far (``best`` if nothing beats
+        it); failed providers are appended to ``failures``.
+        """
+        threshold = config.SIMILARITY_THRESHOLDS["overall_match"]
+        tasks = [asyncio.ensure_future(self.search_provider(p, citation)) for p in providers]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    candidates = await next_done
+                except TransportError as e:
+                    logger.warning("Errore ricerca: %s", e)
+                    failures.append(e)
+                    continue
+                if not candidates:
+                    continue
+                result = evaluate_candidates(citation, candidates)
+                if best is None or result['score'] > best['score']:
+                    best = result
+                if best['score'] >= threshold:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return best
+
+    async def search_federated(self, citation) -> Dict:
+        """Search the providers for a citation and evaluate the best match.
+
+        Raises ``TransportError`` when nothing was found and some provider
+        could not be reached, since the citation may well be there.
+        """
+        first, escalation = self.plan_providers(citation)
+        failures: List[TransportError] = []
+        best = await self._fan_out(citation, first, None, failures)
+        threshold = config.SIMILARITY_THRESHOLDS["overall_match"]
+        if escalation and (best is None or best['score'] < threshold):
+            best = await self._fan_out(citation, escalation, best, failures)
+        if best is None:
+            if failures:
+                # A call cut short by the budget makes the citation unverified, not unavailable
+                raise next((e for e in failures if isinstance(e, resilience.DeadlineExceeded)),
+                           failures[0])
+            return evaluate_candidates(citation, [])
+        return best
+
+    async def _resolve_doi_batch(self, flights: Dict[str, Any]) -> None:
+        """Resolve one batch of uncached DOIs this engine leads the flights of.
+
+        The outcome of each DOI is recorded and handed to the flight's
+        waiters; a failed request fails the flights, so every waiter
+        retries on its own.
+        """
+        dois = list(flights)
+        try:
+            records = await self._call(
+                crossref.DB_ID, lambda: crossref.resolve_dois(self.transport, dois)
+            )
+        except TransportError as e:
+            # Left unrecorded, so resolve_doi() retries them one at a time
+            logger.warning("Errore risoluzione DOI CrossRef: %s", e)
+            for doi, future in flights.items():
+                get_flights().finish(doi_flight(doi), future, error=e)
+            return
+        for doi, future in flights.items():
+            record = records.get(doi)
+            self._doi_records[doi] = record
+            if self.cache is not None:
+                # An empty dict marks a DOI that does not resolve
+                self.cache.set(crossref.DB_ID, f"doi:{doi}", record or {})
+            get_flights().finish(doi_flight(doi), future, record)
+
+    async def _join_doi(self, doi: str, future) -> None:
+        """Take the outcome of a DOI another run is already resolving."""
+        try:
+            self._doi_records[doi] = await wait(future)
+        except (TransportError, Abandoned):
+            # Left unrecorded, so resolve_doi() retries it
+            pass
+
+    async def prefetch_dois(self, dois) -> None:
+        """Resolve many DOIs up front, ``DOI_BATCH_SIZE`` per request.
+
+        DOIs found in the local index or the cache cost no request, and
+        DOIs already being resolved elsewhere in the process are awaited
+        rather than requested again.
+        """
+        pending = []
+        for doi in dict.fromkeys(crossref.normalize_doi(d) for d in dois):
+            if doi in self._doi_records:
+                continue
+            record = self.index.lookup_doi(doi) if self.index is not None else None
+            if record is not None:
+                self._doi_records[doi] = record
+                continue
+            cached = self.cache.get(crossref.DB_ID, f"doi:{doi}") if self.cache is not None else None
+            if cached is not None:
+                self._doi_records[doi] = cached or None
+            else:
+                pending.append(doi)
+
+        owned, joined = {}, []
+        for doi in pending:
+            future, leader = get_flights().claim(doi_flight(doi))
+            if leader:
+                owned[doi] = future
+            else:
+                joined.append(self._join_doi(doi, future))
+
+        owned = list(owned.items())
+        size = config.DOI_BATCH_SIZE
+        try:
+            await asyncio.gather(*joined, *(
+                self._resolve_doi_batch(dict(owned[i:i + size])) for i in range(0, len(owned), size)
+            ))
+        finally:
+            # Batches cancelled before landing their flights must not strand the waiters
+            for doi, future in owned:
+                if not future.done():
+                    get_flights().finish(doi_flight(doi), future, error=Abandoned())
+
+    async def resolve_doi(self, doi: str) -> Optional[Dict]:
+        """Return the record a DOI points to, or ``None`` if it does not resolve."""
+        doi = crossref.normalize_doi(doi)
+        if doi not in self._doi_records:
+            await self.prefetch_dois([doi])
+        return self._doi_records.get(doi)
+
+    def verify_locally(self, citation) -> Optional[Dict]:
+        """Verify offline: the local index, then near duplicates of works resolved earlier.
+
+        Returns ``None`` unless a verified match is found.
+        """
+        if self.index is not None:
+            candidates = self.index.search(citation)
+            if candidates:
+                result = evaluate_candidates(citation, candidates)
+                if result['status'] == 'verified':
+                    return result
+        if self.resolved is not None:
+            return self.resolved.match(citation)
+        return None
+
+    def remember(self, result: Dict) -> None:
+        """Index the record that verified a citation for later near-duplicate matches."""
+        if self.resolved is not None and result['status'] == 'verified' and result['best_match']:
+            self.resolved.add(result['best_match'])
+
+    async def verify(self, citation) -> Dict:
+        """Verify a single citation.
+
+        A citation with a DOI is checked against the exact record the DOI
+        resolves to. Otherwise, or if the DOI does not resolve, the offline
+        index and the works resolved earlier are searched, and a federated
+        search over the network is the last resort.
+        """
+        async with self._semaphore:
+            try:
+                if citation.doi:
+                    record = await self.resolve_doi(citation.doi)
+                    if record is not None:
+                        return evaluate_record(citation, record)
+
+                result = self.verify_locally(citation)
+                if result is None:
+                    if self.budget_spent():
+                        result = unverified_result()
+                    else:
+                        result = await self.search_federated(citation)
+            except TransportError as e:
+                # Under a run budget a timeout means this citation's share ran out
+                if self.budget_spent() or (self._deadline is not None
+                                           and isinstance(e, resilience.DeadlineExceeded)):
+                    result = unverified_result()
+                else:
+                    logger.warning("Errore ricerca: %s", e)
+                    result = unavailable_result(e)
+        return self.flag_invalid_doi(citation, result)
+
+    def flag_invalid_doi(self, citation, result: Dict) -> Dict:
+        """Report a citation's DOI as invalid once it is confirmed not to resolve.
+
+        A DOI whose request failed is not in ``_doi_records`` and is not
+        flagged, since it may well be valid.
+        """
+        if citation.doi:
+            doi = crossref.normalize_doi(citation.doi)
+            if doi in self._doi_records and self._doi_records[doi] is None:
+                result['errors'].insert(0, config.ERROR_TYPES["DOI_INVALID"])
+        return result
+
+    def previous_verdict(self, citation) -> Optional[Dict]:
+        """The stored verdict for an identical citation, marked ``'reused'``."""
+        if self.verdicts is None:
+            return None
+        result = self.verdicts.get(VERDICT_NAMESPACE, citation.fingerprint())
+        if result is not None:
+            result['reused'] = True
+        return result
+
+    def store_verdict(self, citation, result: Dict) -> None:
+        if self.verdicts is not None and result['status'] in REUSABLE_STATUSES:
+            self.verdicts.set(VERDICT_NAMESPACE, citation.fingerprint(), stored_result(result))
+
+    async def verify_all(self, citations: List, on_result: Optional[ResultCallback] = None,
+                         cancel: Optional[threading.Event] = None) -> List[Optional[Dict]]:
+        """Verify ``citations`` concurrently, returning results in input order.
+
+        Citations verified in an earlier run (same fingerprint) reuse that
+        verdict without any request; the others are started in scheduler
+        priority order. Each result carries its citation under the
+        ``'citation'`` key. Setting ``cancel`` (from any thread) stops the
+        run: lookups in flight are abandoned and the citations they were
+        verifying are left as ``None``. The run budget starts here: when it
+        is spent, the citations not verified yet come back ``'unverified'``.
+        A citation whose verification raises comes back ``'unavailable'``
+        without affecting the others.
+        """
+        if self.budget is not None:
+            self._deadline = time.monotonic() + self.budget
+        # A long-lived engine (one per API worker) must not accumulate every DOI it saw
+        self._doi_records = {}
+        results: List[Optional[Dict]] = [None] * len(citations)
+        reused = {}
+        for i, citation in enumerate(citations):
+            try:
+                result = self.previous_verdict(citation)
+            except Exception:
+                # A malformed citation is failed on its own by run()
+                result = None
+            if result is not None:
+                reused[i] = result
+        await self.prefetch_dois(
+            c.doi for i, c in enumerate(citations) if c.doi and i not in reused
+        )
+
+        self._left = len(citations) - len(reused)
+
+        def finish(index, result):
+            result['citation'] = citations[index]
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+
+        async def run(index, citation):
+            result = reused.get(index)
+            if result is None:
+                try:
+                    result = await self.verify(citation)
+                    self.store_verdict(citation, result)
+                    self.remember(result)
+                except Exception as e:
+                    # Only this citation fails, not the others of the run
+                    logger.exception("Errore nella verifica di una citazione")
+                    result = unavailable_result(e)
+                finally:
+                    self._left -= 1
+            finish(index, result)
+
+        # Tasks queue on the semaphore in creation order, i.e. by priority
+        tasks = {asyncio.ensure_future(run(i, citations[i])): i for i in schedule(citations)}
+        if cancel is None and self._deadline is None:
+            await asyncio.gather(*tasks)
+            return results
+
+        pending = set(tasks)
+        while pending and not (cancel is not None and cancel.is_set()):
+            timeout = CANCEL_POLL_SECONDS if cancel is not None else None
+            if self._deadline is not None:
+                remaining = max(0.0, self._deadline - time.monotonic())
+                if remaining == 0:
+                    break
+                timeout = min(timeout, remaining) if timeout is not None else remaining
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if not (cancel is not None and cancel.is_set()):
+            # Out of time: mark what was not reached instead of dropping it
+            for task in pending:
+                index = tasks[task]
+                if results[index] is None:
+                    finish(index, self.flag_invalid_doi(citations[index], unverified_result()))
+        return results
+
+
+def verify_citations(citations: List, on_result: Optional[ResultCallback] = None,
+                     cancel: Optional[threading.Event] = None,
+                     budget: Optional[float] = config.RUN_BUDGET_SECONDS) -> List[Optional[Dict]]:
+    """Synchronous entry point: verify a list of citations within ``budget`` seconds."""
+    async def run():
+        async with VerificationEngine(budget=budget) as engine:
+            return await engine.verify_all(citations, on_result, cancel)
+
+    return asyncio.run(run())
+
+
+def verify_citation(citation) -> Dict:
+    """Synchronous entry point: verify a single citation."""
+    async def run():
+        async with VerificationEngine() as engine:
+            return await engine.verify(citation)
+
+    return asyncio.run(run())
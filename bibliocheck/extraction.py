@@ -0,0 +1,183 @@
+"""
+Text extraction from uploaded documents.
+
+PyPDF2 is imported only when a PDF is actually read; DOCX files are
+streamed by ``bibliocheck.docx_reader``. PDF pages are decoded lazily: ``extract_bibliography``
+walks a PDF backwards from the last page and stops at the bibliography
+heading, so the body of the document is never decoded. Pages without a
+text layer are OCRed when ``FEATURES["enable_pdf_ocr"]`` is on (see
+``bibliocheck.ocr``). Reference-manager exports (BibTeX, RIS, CSL-JSON)
+carry their citations already structured and are read by
+``bibliocheck.bibfiles``.
+"""
+
+import logging
+import os
+from typing import Iterator, List, Sequence, Tuple
+
+import config
+from bibliocheck import ocr
+from bibliocheck.bibfiles import REFERENCE_FORMATS, read_reference_file
+from bibliocheck.csl import citation_from_csl
+from bibliocheck.docx_reader import iter_paragraphs, read_docx
+from bibliocheck.models import Citation
+from bibliocheck.parsing import find_bibliography_heading, find_bibliography_section
+
+logger = logging.getLogger(__name__)
+
+
+def _page_texts(pdf_reader, indices: Sequence[int]) -> Iterator[str]:
+    """Yield the text of the given pages in order.
+
+    With OCR enabled, pages are decoded one chunk of ``os.cpu_count()`` at
+    a time and the pages of a chunk that lack a text layer are OCRed in
+    parallel.
+    """
+    if not ocr.enabled():
+        for index in indices:
+            yield pdf_reader.pages[index].extract_text() or ""
+        return
+
+    chunk_size = os.cpu_count() or 1
+    for start in range(0, len(indices), chunk_size):
+        chunk = indices[start:start + chunk_size]
+        texts = [pdf_reader.pages[index].extract_text() or "" for index in chunk]
+        missing = [i for i, text in enumerate(texts) if ocr.needs_ocr(text)]
+        if missing:
+            recognized = ocr.ocr_pages([pdf_reader.pages[chunk[i]] for i in missing])
+            for i, text in zip(missing, recognized):
+                texts[i] = text
+        yield from texts
+
+
+def iter_pdf_pages(source, reverse: bool = False) -> Iterator[str]:
+    """Yield the text of each PDF page, decoding one page at a time."""
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(source)
+    count = len(pdf_reader.pages)
+    indices = range(count - 1, -1, -1) if reverse else range(count)
+    yield from _page_texts(pdf_reader, indices)
+
+
+# Funzione per estrarre testo da PDF
+def extract_text_from_pdf(source) -> str:
+    """Extract text from a PDF given a path or a binary file object."""
+    try:
+        return "".join(page + "\n" for page in iter_pdf_pages(source))
+    except Exception as e:
+        logger.error("Errore nell'estrazione PDF: %s", e)
+        return ""
+
+
+def extract_bibliography_from_pdf(source, scan_pages: int = config.BIBLIOGRAPHY_SCAN_PAGES) -> str:
+    """Extract only the bibliography section of a PDF.
+
+    Pages are decoded from the last one backwards until a heading from
+    ``config.BIBLIOGRAPHY_PATTERNS`` is found, at most ``scan_pages`` of
+    them. Without a heading the last 30% of the pages is returned, as
+    ``find_bibliography_section`` does for plain text.
+    """
+    try:
+        import PyPDF2
+
+        pdf_reader = PyPDF2.PdfReader(source)
+        count = len(pdf_reader.pages)
+
+        # Pagine lette dalla fine, in ordine inverso
+        tail = []
+        for text in _page_texts(pdf_reader, range(count - 1, max(count - scan_pages, 0) - 1, -1)):
+            page = text + "\n"
+            offset = find_bibliography_heading(page)
+            if offset is not None:
+                tail.append(page[offset:])
+                return "".join(reversed(tail))
+            tail.append(page)
+
+        # Nessuna intestazione trovata: ultimo 30% delle pagine
+        first = int(count * 0.7)
+        scanned_from = count - len(tail)
+        pages = [text + "\n" for text in _page_texts(pdf_reader, range(first, scanned_from))]
+        pages.extend(list(reversed(tail))[max(first - scanned_from, 0):])
+        return "".join(pages)
+    except Exception as e:
+        logger.error("Errore nell'estrazione PDF: %s", e)
+        return ""
+
+
+# Funzione per estrarre testo da DOCX
+def extract_text_from_docx(source) -> str:
+    """Extract text from a DOCX given a path or a binary file object.
+
+    Tables, footnotes and endnotes are included.
+    """
+    try:
+        return ''.join(paragraph + '\n' for paragraph in iter_paragraphs(source))
+    except Exception as e:
+        logger.error("Errore nell'estrazione DOCX: %s", e)
+        return ""
+
+
+def _extension(source, filename) -> str:
+    name = filename or getattr(source, 'name', None) or str(source)
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in config.SUPPORTED_FORMATS:
+        raise ValueError(f"Formato non supportato: {extension or name}")
+    return extension
+
+
+def extract_references(source, filename=None) -> List[Citation]:
+    """Citations of a BibTeX, RIS or CSL-JSON export; empty on a malformed file."""
+    try:
+        return read_reference_file(source, filename)
+    except Exception as e:
+        logger.error("Errore nella lettura del file di riferimenti: %s", e)
+        return []
+
+
+def extract_text(source, filename=None) -> str:
+    """Extract text from a supported document, dispatching on its extension.
+
+    ``source`` is a path or a file object; file objects without a ``name``
+    attribute need ``filename``. Reference files yield one formatted
+    reference per line.
+    """
+    extension = _extension(source, filename)
+    if extension == '.pdf':
+        return extract_text_from_pdf(source)
+    if extension in REFERENCE_FORMATS:
+        return ''.join(c.original_text + '\n' for c in extract_references(source, filename))
+    return extract_text_from_docx(source)
+
+
+def extract_bibliography(source, filename=None) -> str:
+    """Extract just the bibliography section of a supported document."""
+    extension = _extension(source, filename)
+    if extension == '.pdf':
+        return extract_bibliography_from_pdf(source)
+    if extension in REFERENCE_FORMATS:
+        # The whole file is the bibliography
+        return extract_text(source, filename)
+    return find_bibliography_section(extract_text_from_docx(source))
+
+
+def extract_document(source, filename=None) -> Tuple[str, List[Citation]]:
+    """Bibliography text plus the citations stored by a reference manager.
+
+    For a DOCX written with Zotero or Mendeley the second element holds
+    the cited items, built from their CSL-JSON field codes; it is empty
+    for PDFs and for documents with plain-text references. Reference
+    files (``.bib``, ``.ris``, CSL-JSON) yield no text, only citations.
+    """
+    extension = _extension(source, filename)
+    if extension == '.pdf':
+        return extract_bibliography_from_pdf(source), []
+    if extension in REFERENCE_FORMATS:
+        return "", extract_references(source, filename)
+    try:
+        content = read_docx(source)
+    except Exception as e:
+        logger.error("Errore nell'estrazione DOCX: %s", e)
+        return "", []
+    citations = [citation_from_csl(item) for item in content.field_items]
+    return find_bibliography_section(content.text), citations
@@ -0,0 +1,112 @@
+"""
+Verdict history for incremental re-verification.
+
+Verification results are stored by citation fingerprint (see
+``Citation.fingerprint``), so when a revised draft of a document is
+checked again only added or edited references go to the network; the
+others reuse their previous verdict. The outcome of each run is recorded
+per document too, and ``compare_with_last_run`` reports what changed
+since the previous one.
+
+The store is a ``LookupCache`` file of its own with a long TTL: verdicts
+under the ``verdict`` namespace, runs under ``run``.
+"""
+
+import threading
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.cache import LookupCache, normalize_key
+
+VERDICT_NAMESPACE = "verdict"
+RUN_NAMESPACE = "run"
+
+# Statuses that describe the reference rather than a transient failure
+REUSABLE_STATUSES = {'verified', 'error', 'not_found', 'uncertain'}
+# Statuses of citations a follow-up run should verify again
+RETRYABLE_STATUSES = {'unavailable', 'unverified'}
+
+
+def stored_result(result: Dict) -> Dict:
+    """The part of a result worth storing: everything but the citation itself."""
+    return {key: value for key, value in result.items() if key not in ('citation', 'reused')}
+
+
+def run_entries(results: List[Dict]) -> List[Dict]:
+    return [
+        {
+            'fingerprint': result['citation'].fingerprint(),
+            'status': result['status'],
+            'original_text': result['citation'].original_text,
+        }
+        for result in results
+    ]
+
+
+def diff_runs(previous: List[Dict], current: List[Dict]) -> Dict:
+    """Compare the entries of two runs of the same document.
+
+    ``added`` holds references that are new or were edited, ``removed``
+    those no longer present (an edited reference shows up in both), and
+    ``status_changed`` unchanged references whose verdict differs.
+    """
+    before = {entry['fingerprint']: entry for entry in previous}
+    after = {entry['fingerprint']: entry for entry in current}
+
+    status_changed = [
+        {
+            'original_text': entry['original_text'],
+            'previous_status': before[fingerprint]['status'],
+            'status': entry['status'],
+        }
+        for fingerprint, entry in after.items()
+        if fingerprint in before and before[fingerprint]['status'] != entry['status']
+    ]
+    return {
+        'added': [e['original_text'] for f, e in after.items() if f not in before],
+        'removed': [e['original_text'] for f, e in before.items() if f not in after],
+        'status_changed': status_changed,
+        'unchanged': sum(1 for f in after if f in before),
+    }
+
+
+def last_run(store: Optional[LookupCache], filename: str) -> Optional[List[Dict]]:
+    """Entries of the previous run of ``filename``, or ``None``."""
+    if store is None:
+        return None
+    return store.get(RUN_NAMESPACE, normalize_key(filename))
+
+
+def record_run(store: Optional[LookupCache], filename: str, results: List[Dict]) -> None:
+    if store is not None:
+        store.set(RUN_NAMESPACE, normalize_key(filename), run_entries(results))
+
+
+def compare_with_last_run(store: Optional[LookupCache], filename: str,
+                          results: List[Dict]) -> Optional[Dict]:
+    """Record this run of ``filename`` and diff it against the previous one.
+
+    Returns ``None`` for the first run of a document or without a store.
+    """
+    previous = last_run(store, filename)
+    record_run(store, filename, results)
+    return diff_runs(previous, run_entries(results)) if previous is not None else None
+
+
+_store: Optional[LookupCache] = None
+_store_lock = threading.Lock()
+
+
+def get_verdict_store() -> Optional[LookupCache]:
+    """Return the process-wide verdict store, or ``None`` when disabled."""
+    global _store
+    if not config.VERDICT_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = LookupCache(
+                path=config.VERDICT_STORE_PATH,
+                ttl_hours=config.VERDICT_TTL_HOURS,
+                max_size=config.VERDICT_MAX_SIZE,
+            )
+        return _store
@@ -0,0 +1,289 @@
+"""
+Offline reference index.
+
+Metadata snapshots (CrossRef, PubMed or arXiv JSONL dumps, optionally
+gzipped) are ingested into a SQLite database with an FTS5 full-text index
+on normalized titles plus DOI and first-author/year keys. The engine
+consults it before the network, so most lookups cost a few milliseconds,
+and verification keeps working in air-gapped environments.
+
+Build or extend an index with::
+
+    bibliocheck-index build crossref-2024.jsonl.gz pubmed.jsonl
+    bibliocheck-index stats
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import config
+from bibliocheck.cache import normalize_key
+from bibliocheck.providers import crossref
+
+logger = logging.getLogger(__name__)
+
+# Title words considered by the full-text query
+FTS_MAX_TERMS = 12
+
+
+def first_author_key(authors: List[str]) -> str:
+    """Normalized family name of the first author ("LeCun, Y." -> "lecun")."""
+    if not authors:
+        return ''
+    return normalize_key(authors[0].split(',')[0])
+
+
+def _year(value) -> Optional[str]:
+    value = str(value or '')[:4]
+    return value if value.isdigit() else None
+
+
+def record_from_crossref(item: Dict) -> Optional[Dict]:
+    record = crossref.parse_item(item)
+    if record is not None and not record['year'] and 'issued' in item:
+        try:
+            record['year'] = str(item['issued']['date-parts'][0][0])
+        except (KeyError, IndexError, TypeError):
+            pass
+    return record
+
+
+def record_from_arxiv(item: Dict) -> Dict:
+    """Record from the arXiv metadata snapshot format (``authors_parsed``)."""
+    authors = []
+    for parts in item.get('authors_parsed', [])[:3]:
+        name = parts[0]
+        if len(parts) > 1 and parts[1]:
+            name += f", {parts[1]}"
+        authors.append(name)
+    year = None
+    if item.get('versions'):
+        # "Mon, 2 Apr 2007 19:18:42 GMT"
+        created = item['versions'][0].get('created', '').split()
+        year = _year(created[3]) if len(created) > 3 else None
+    return {
+        'title': ' '.join((item.get('title') or '').split()),
+        'authors': authors,
+        'year': year or _year(item.get('update_date')),
+        'journal': item.get('journal-ref'),
+        'doi': item.get('doi') or '',
+        'database': 'arXiv'
+    }
+
+
+def record_from_pubmed(item: Dict) -> Dict:
+    """Record from a PubMed JSONL export (one article per line)."""
+    authors = []
+    for author in (item.get('authors') or [])[:3]:
+        if isinstance(author, dict):
+            name = author.get('lastname') or author.get('last_name') or author.get('name', '')
+            given = author.get('forename') or author.get('initials')
+            authors.append(f"{name}, {given}" if given else name)
+        else:
+            authors.append(str(author))
+    return {
+        'title': item.get('title', ''),
+        'authors': authors,
+        'year': _year(item.get('year') or item.get('pubdate')),
+        'journal': item.get('journal'),
+        'doi': item.get('doi') or '',
+        'database': 'PubMed'
+    }
+
+
+def parse_dump_line(item: Dict) -> Optional[Dict]:
+    """Recognize the dump format of one JSON object and convert it to a record."""
+    if 'DOI' in item or 'container-title' in item:
+        return record_from_crossref(item)
+    if 'authors_parsed' in item:
+        return record_from_arxiv(item)
+    if 'pmid' in item:
+        return record_from_pubmed(item)
+    return None
+
+
+def iter_dump(path: str) -> Iterator[Dict]:
+    """Yield records from a JSONL dump, transparently decompressing ``.gz``."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                logger.warning("%s:%d: riga JSON non valida", path, line_number)
+                continue
+            # CrossRef API dumps wrap items in {"message": ...}
+            if 'message' in item and isinstance(item['message'], dict):
+                item = item['message']
+            record = parse_dump_line(item)
+            if record is not None and record['title']:
+                yield record
+
+
+class LocalIndex:
+    """SQLite/FTS5 index of known works, queried before any network lookup."""
+
+    def __init__(self, path: str = config.LOCAL_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS works (
+                id INTEGER PRIMARY KEY,
+                doi TEXT,
+                norm_title TEXT NOT NULL,
+                first_author TEXT,
+                year TEXT,
+                record TEXT NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS works_doi ON works (doi) WHERE doi != '';
+            CREATE UNIQUE INDEX IF NOT EXISTS works_no_doi
+                ON works (norm_title, first_author, year) WHERE doi = '';
+            CREATE INDEX IF NOT EXISTS works_title ON works (norm_title);
+            CREATE INDEX IF NOT EXISTS works_author_year ON works (first_author, year);
+            CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+                norm_title, content='works', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS works_ai AFTER INSERT ON works BEGIN
+                INSERT INTO works_fts (rowid, norm_title) VALUES (new.id, new.norm_title);
+            END;
+            CREATE TRIGGER IF NOT EXISTS works_ad AFTER DELETE ON works BEGIN
+                INSERT INTO works_fts (works_fts, rowid, norm_title)
+                VALUES ('delete', old.id, old.norm_title);
+            END;
+            """
+        )
+
+    def add(self, records: Iterable[Dict], batch_size: int = 10000) -> int:
+        """Insert records, skipping works already present. Returns the count added.
+
+        A work is identified by its DOI, or by normalized title, first
+        author and year when it has none.
+        """
+        added = 0
+        batch = []
+
+        def flush():
+            nonlocal added
+            with self._lock, self._conn:
+                cursor = self._conn.executemany(
+                    "INSERT OR IGNORE INTO works (doi, norm_title, first_author, year, record)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    batch,
+                )
+                added += cursor.rowcount
+            batch.clear()
+
+        for record in records:
+            batch.append((
+                crossref.normalize_doi(record['doi']) if record.get('doi') else '',
+                normalize_key(record['title']),
+                first_author_key(record.get('authors') or []),
+                record.get('year'),
+                json.dumps(record, ensure_ascii=False),
+            ))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return added
+
+    def _records(self, sql: str, params) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def lookup_doi(self, doi: str) -> Optional[Dict]:
+        records = self._records(
+            "SELECT record FROM works WHERE doi = ?", (crossref.normalize_doi(doi),)
+        )
+        return records[0] if records else None
+
+    def search(self, citation, limit: int = 10) -> List[Dict]:
+        """Candidate records for a citation: exact title, full-text title and author/year keys."""
+        candidates = {}
+
+        def collect(records):
+            for record in records:
+                candidates.setdefault(record.get('doi') or record['title'], record)
+
+        if citation.title:
+            norm_title = normalize_key(citation.title)
+            collect(self._records("SELECT record FROM works WHERE norm_title = ?", (norm_title,)))
+            terms = sorted(set(norm_title.split()), key=len, reverse=True)[:FTS_MAX_TERMS]
+            if terms:
+                query = ' OR '.join('"{}"'.format(term.replace('"', '')) for term in terms)
+                collect(self._records(
+                    "SELECT works.record FROM works_fts JOIN works ON works.id = works_fts.rowid"
+                    " WHERE works_fts MATCH ? ORDER BY bm25(works_fts) LIMIT ?",
+                    (query, limit),
+                ))
+
+        author = first_author_key(citation.authors)
+        if author and citation.year:
+            collect(self._records(
+                "SELECT record FROM works WHERE first_author = ? AND year = ? LIMIT ?",
+                (author, citation.year, limit),
+            ))
+
+        return list(candidates.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+
+_index: Optional[LocalIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_local_index() -> Optional[LocalIndex]:
+    """Return the process-wide index, or ``None`` if disabled or never built."""
+    global _index
+    if not config.LOCAL_INDEX_ENABLED or not os.path.exists(config.LOCAL_INDEX_PATH):
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = LocalIndex()
+        return _index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="bibliocheck-index",
+        description="Gestione dell'indice bibliografico locale.",
+    )
+    parser.add_argument("--path", default=config.LOCAL_INDEX_PATH,
+                        help="file dell'indice (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="importa dump JSONL (CrossRef, PubMed, arXiv)")
+    build.add_argument("dumps", nargs="+", metavar="DUMP", help="file .jsonl o .jsonl.gz")
+    commands.add_parser("stats", help="numero di opere indicizzate")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL), format=config.LOG_FORMAT)
+    index = LocalIndex(args.path)
+
+    if args.command == "build":
+        for dump in args.dumps:
+            added = index.add(iter_dump(dump))
+            logger.info("%s: %d opere aggiunte", dump, added)
+    print(f"{len(index)} opere nell'indice {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Background verification jobs.
+
+A job verifies a list of citations in a worker thread, independently of
+the caller: each result is checkpointed to SQLite as soon as it is
+known, so a closed browser tab loses nothing and the UI can poll the job
+by its ID and reattach later. A job interrupted by a server restart is
+resumed by verifying only the citations that have no result yet (or
+whose databases were unreachable, or that the run budget did not reach).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.history import RETRYABLE_STATUSES, stored_result
+from bibliocheck.models import Citation
+
+logger = logging.getLogger(__name__)
+
+# Job states; "interrupted" is reported for a running job no live worker owns
+QUEUED, RUNNING, COMPLETED, CANCELLED, FAILED, INTERRUPTED = (
+    'queued', 'running', 'completed', 'cancelled', 'failed', 'interrupted'
+)
+
+
+class JobManager:
+    """Run verification jobs on a thread pool, checkpointing every result."""
+
+    def __init__(self, path: str = config.JOBS_PATH, max_workers: int = config.JOB_WORKERS):
+        self.path = path
+        self._lock = threading.Lock()
+        # job ID -> cancel event of the jobs owned by a live worker
+        self._active: Dict[str, threading.Event] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="bibliocheck-job")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                filename TEXT,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                citations TEXT NOT NULL,
+                error TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, position)
+            );
+            """
+        )
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        self._execute(
+            "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+            (status, error, time.time(), job_id),
+        )
+
+    def submit(self, citations: List[Citation], filename: Optional[str] = None,
+               budget: Optional[float] = config.RUN_BUDGET_SECONDS) -> str:
+        """Queue a job verifying ``citations`` within ``budget`` seconds and return its ID."""
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, filename, status, total, citations, created, updated)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, filename, QUEUED, len(citations),
+             json.dumps([c.to_dict() for c in citations], ensure_ascii=False), now, now),
+        )
+        self._start(job_id, budget)
+        return job_id
+
+    def resume(self, job_id: str, budget: Optional[float] = config.RUN_BUDGET_SECONDS) -> bool:
+        """Restart an interrupted, cancelled or failed job; ``False`` if it cannot be resumed."""
+        job = self.status(job_id)
+        if job is None or job['status'] not in (INTERRUPTED, CANCELLED, FAILED):
+            return False
+        self._set_status(job_id, QUEUED)
+        self._start(job_id, budget)
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a running job, keeping the results checkpointed so far."""
+        with self._lock:
+            event = self._active.get(job_id)
+        if event is None:
+            return False
+        event.set()
+        return True
+
+    def _start(self, job_id: str, budget: Optional[float]) -> None:
+        event = threading.Event()
+        with self._lock:
+            self._active[job_id] = event
+        self._executor.submit(self._run, job_id, event, budget)
+
+    def _run(self, job_id: str, cancel: threading.Event, budget: Optional[float]) -> None:
+        from bibliocheck.engine import verify_citations
+
+        try:
+            self._set_status(job_id, RUNNING)
+            citations = self.citations(job_id)
+            done = {
+                position for position, result in enumerate(self.results(job_id))
+                if result is not None and result['status'] not in RETRYABLE_STATUSES
+            }
+            pending = [i for i in range(len(citations)) if i not in done]
+
+            def checkpoint(index, result):
+                self._execute(
+                    "INSERT OR REPLACE INTO job_results (job_id, position, result) VALUES (?, ?, ?)",
+                    (job_id, pending[index], json.dumps(stored_result(result), ensure_ascii=False)),
+                )
+
+            if not cancel.is_set():
+                verify_citations([citations[i] for i in pending], on_result=checkpoint,
+                                 cancel=cancel, budget=budget)
+            self._set_status(job_id, CANCELLED if cancel.is_set() else COMPLETED)
+        except Exception as e:
+            logger.exception("Job %s fallito", job_id)
+            self._set_status(job_id, FAILED, str(e))
+        finally:
+            with self._lock:
+                # A resume may already have registered a new run of this job
+                if self._active.get(job_id) is cancel:
+                    del self._active[job_id]
+
+    def citations(self, job_id: str) -> List[Citation]:
+        rows = self._execute("SELECT citations FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return []
+        return [Citation(**data) for data in json.loads(rows[0][0])]
+
+    def results(self, job_id: str) -> List[Optional[Dict]]:
+        """Checkpointed results in citation order, ``None`` where still pending.
+
+        Each result carries its citation under the ``'citation'`` key, as
+        returned by the engine.
+        """
+        citations = self.citations(job_id)
+        results: List[Optional[Dict]] = [None] * len(citations)
+        for position, payload in self._execute(
+            "SELECT position, result FROM job_results WHERE job_id = ?", (job_id,)
+        ):
+            result = json.loads(payload)
+            result['citation'] = citations[position]
+            results[position] = result
+        return results
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Progress of a job, or ``None`` if the ID is unknown."""
+        rows = self._execute(
+            "SELECT filename, status, total, error, created, updated,"
+            " (SELECT COUNT(*) FROM job_results WHERE job_id = jobs.id)"
+            " FROM jobs WHERE id = ?",
+            (job_id,),
+        )
+        if not rows:
+            return None
+        filename, status, total, error, created, updated, completed = rows[0]
+        with self._lock:
+            active = job_id in self._active
+        if status in (QUEUED, RUNNING) and not active:
+            # Its worker died with a previous server process
+            status = INTERRUPTED
+        return {
+            'id': job_id,
+            'filename': filename,
+            'status': status,
+            'total': total,
+            'completed': completed,
+            'error': error,
+            'created': created,
+            'updated': updated,
+        }
+
+    def list_jobs(self, limit: int = 10) -> List[Dict]:
+        """Most recent jobs first."""
+        rows = self._execute("SELECT id FROM jobs ORDER BY created DESC LIMIT ?", (limit,))
+        return [self.status(job_id) for (job_id,) in rows]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager, shared by every UI session."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -0,0 +1,254 @@
+"""
+Query building and similarity scoring for citation verification.
+
+Scoring is vectorized: fields are normalized once into a ``FieldSet`` and
+``score_matrix`` scores a whole citations x candidates matrix with
+``rapidfuzz.process.cdist`` and numpy, falling back to a pure-Python loop
+when those packages are not installed.
+"""
+
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.cache import normalize_key
+from bibliocheck.providers.crossref import normalize_doi
+
+# Year similarity for a year within the tolerance but not equal
+YEAR_NEAR_MISS = 2 / 3
+
+
+def build_query(citation) -> str:
+    """Build the free-text search query for a citation."""
+    query_parts = []
+
+    if citation.title and len(citation.title) > 5:
+        query_parts.append(f'"{citation.title}"')
+
+    if citation.authors:
+        # Prendi primo autore
+        first_author = citation.authors[0].split(',')[0]
+        query_parts.append(first_author)
+
+    if citation.year:
+        query_parts.append(citation.year)
+
+    return ' '.join(query_parts)
+
+
+def _fuzz():
+    """Return the fuzzy string scorer module: rapidfuzz if available, else fuzzywuzzy."""
+    try:
+        from rapidfuzz import fuzz
+    except ImportError:
+        from fuzzywuzzy import fuzz
+    return fuzz
+
+
+def _field(item, name):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def _parse_year(year) -> Optional[int]:
+    try:
+        return int(str(year)[:4])
+    except (TypeError, ValueError):
+        return None
+
+
+class FieldSet:
+    """Matching fields of citations or database records, normalized once.
+
+    Accepts ``Citation`` objects and result dicts alike. Authors are
+    flattened into one list, with ``author_owner`` mapping each author back
+    to the index of its item, so all author pairs of a batch can be scored
+    in a single call.
+    """
+
+    def __init__(self, items):
+        self.size = len(items)
+        self.titles = []
+        self.years = []
+        self.dois = []
+        self.authors = []
+        self.author_owner = []
+        for index, item in enumerate(items):
+            title = _field(item, 'title')
+            doi = _field(item, 'doi')
+            self.titles.append(normalize_key(title) if title else '')
+            self.years.append(_parse_year(_field(item, 'year')))
+            self.dois.append(normalize_doi(doi) if doi else '')
+            for author in _field(item, 'authors') or []:
+                self.authors.append(normalize_key(author))
+                self.author_owner.append(index)
+
+
+def _year_similarity(c_year, r_year) -> float:
+    if c_year == r_year:
+        return 1.0
+    if abs(c_year - r_year) <= config.SIMILARITY_THRESHOLDS["year_tolerance"]:
+        return YEAR_NEAR_MISS
+    return 0.0
+
+
+def _score_matrix_python(c: FieldSet, r: FieldSet):
+    """Pure-Python fallback for ``score_matrix`` when numpy or rapidfuzz is missing."""
+    fuzz = _fuzz()
+    weights = config.SIMILARITY_WEIGHTS
+    c_authors = [[] for _ in range(c.size)]
+    for author, owner in zip(c.authors, c.author_owner):
+        c_authors[owner].append(author)
+    r_authors = [[] for _ in range(r.size)]
+    for author, owner in zip(r.authors, r.author_owner):
+        r_authors[owner].append(author)
+
+    matrix = []
+    for i in range(c.size):
+        row = []
+        for j in range(r.size):
+            score = 0.0
+            factors = 0.0
+            if c.titles[i] and r.titles[j]:
+                score += weights["title"] * fuzz.token_set_ratio(c.titles[i], r.titles[j]) / 100
+                factors += weights["title"]
+            if c_authors[i] and r_authors[j]:
+                best = max(fuzz.ratio(a, b) for a in c_authors[i] for b in r_authors[j]) / 100
+                score += weights["authors"] * best
+                factors += weights["authors"]
+            if c.years[i] is not None and r.years[j] is not None:
+                score += weights["year"] * _year_similarity(c.years[i], r.years[j])
+                factors += weights["year"]
+            if c.dois[i] and r.dois[j]:
+                score += weights["doi"] * (c.dois[i] == r.dois[j])
+                factors += weights["doi"]
+            row.append(score / factors if factors > 0 else 0.0)
+        matrix.append(row)
+    return matrix
+
+
+def score_matrix(citations, candidates):
+    """Score every citation against every candidate record in one call.
+
+    Returns an ``len(citations) x len(candidates)`` array of scores in
+    [0, 1]: the ``config.SIMILARITY_WEIGHTS`` weighted mean of the title,
+    author, year and DOI similarities, over the fields both sides have.
+    Either argument may be a ``FieldSet`` prepared beforehand. Without
+    numpy and rapidfuzz a list of lists is returned instead.
+    """
+    c = citations if isinstance(citations, FieldSet) else FieldSet(citations)
+    r = candidates if isinstance(candidates, FieldSet) else FieldSet(candidates)
+    try:
+        import numpy as np
+        from rapidfuzz import fuzz, process
+    except ImportError:
+        return _score_matrix_python(c, r)
+
+    weights = config.SIMILARITY_WEIGHTS
+    score = np.zeros((c.size, r.size))
+    factors = np.zeros((c.size, r.size))
+    if c.size == 0 or r.size == 0:
+        return score
+
+    # Confronta titoli
+    c_has = np.array([bool(t) for t in c.titles])
+    r_has = np.array([bool(t) for t in r.titles])
+    if c_has.any() and r_has.any():
+        mask = np.outer(c_has, r_has)
+        sim = process.cdist(c.titles, r.titles, scorer=fuzz.token_set_ratio, workers=-1) / 100
+        score += weights["title"] * sim * mask
+        factors += weights["title"] * mask
+
+    # Confronta autori: miglior coppia per ogni citazione x candidato
+    if c.authors and r.authors:
+        sim = process.cdist(c.authors, r.authors, scorer=fuzz.ratio, workers=-1) / 100
+        c_owner, c_start = np.unique(c.author_owner, return_index=True)
+        r_owner, r_start = np.unique(r.author_owner, return_index=True)
+        best = np.maximum.reduceat(np.maximum.reduceat(sim, c_start, axis=0), r_start, axis=1)
+        mask = np.zeros((c.size, r.size), dtype=bool)
+        mask[np.ix_(c_owner, r_owner)] = True
+        author_sim = np.zeros((c.size, r.size))
+        author_sim[np.ix_(c_owner, r_owner)] = best
+        score += weights["authors"] * author_sim
+        factors += weights["authors"] * mask
+
+    # Confronta anni
+    c_years = np.array([np.nan if y is None else y for y in c.years], dtype=float)
+    r_years = np.array([np.nan if y is None else y for y in r.years], dtype=float)
+    diff = np.abs(c_years[:, None] - r_years[None, :])
+    mask = ~np.isnan(diff)
+    with np.errstate(invalid='ignore'):
+        year_sim = np.where(
+            diff == 0, 1.0,
+            np.where(diff <= config.SIMILARITY_THRESHOLDS["year_tolerance"], YEAR_NEAR_MISS, 0.0)
+        )
+    score += weights["year"] * year_sim * mask
+    factors += weights["year"] * mask
+
+    # Confronta DOI
+    c_dois = np.array(c.dois, dtype=object)
+    r_dois = np.array(r.dois, dtype=object)
+    mask = np.outer(c_dois != '', r_dois != '')
+    score += weights["doi"] * (c_dois[:, None] == r_dois[None, :]) * mask
+    factors += weights["doi"] * mask
+
+    return np.divide(score, factors, out=np.zeros_like(score), where=factors > 0)
+
+
+def calculate_similarity(citation, result) -> float:
+    """Score how well a database record matches a citation (0-1)."""
+    return float(score_matrix([citation], [result])[0][0])
+
+
+def evaluate_candidates(citation, candidates: List[Dict]) -> Dict:
+    """Pick the best candidate for a citation and classify the outcome."""
+    if not candidates:
+        return {
+            'status': 'not_found',
+            'score': 0,
+            'best_match': None,
+            'errors': ['Citazione non trovata nei database accademici']
+        }
+
+    # Trova miglior match
+    best_score = 0
+    best_match = None
+
+    for candidate, score in zip(candidates, score_matrix([citation], candidates)[0]):
+        if score > best_score:
+            best_score = float(score)
+            best_match = candidate
+
+    return classify_match(best_score, best_match)
+
+
+def evaluate_record(citation, record: Dict) -> Dict:
+    """Verify a citation against the exact record its DOI resolved to.
+
+    No ranking is needed; the score only measures whether the citation's
+    own fields agree with the record. A citation that carries nothing but
+    the DOI is verified by the resolution itself.
+    """
+    if citation.title or citation.year or citation.authors:
+        score = calculate_similarity(citation, record)
+    else:
+        score = 1.0
+    return classify_match(score, record)
+
+
+def classify_match(score: float, best_match: Optional[Dict]) -> Dict:
+    """Turn a match score into a verification result."""
+    errors = []
+    if score >= config.STATUS_THRESHOLDS["verified"]:
+        status = 'verified'
+    elif score >= config.STATUS_THRESHOLDS["uncertain"]:
+        status = 'uncertain'
+        errors.append('Match incerto - verificare manualmente')
+    else:
+        status = 'error'
+        errors.append('Nessun match affidabile trovato')
+
+    return {
+        'status': status,
+        'score': score,
+        'best_match': best_match,
+        'errors': errors
+    }
@@ -0,0 +1,43 @@
+"""
+Data model for parsed citations.
+"""
+
+import hashlib
+import json
+
+from bibliocheck.cache import normalize_key
+
+
+# Classe per rappresentare una citazione
+class Citation:
+    def __init__(self, original_text, authors=None, year=None, title=None, doi=None):
+        self.original_text = original_text
+        self.authors = authors or []
+        self.year = year
+        self.title = title
+        self.doi = doi
+
+    def fingerprint(self):
+        """Stable content hash: equal for the same reference in another revision.
+
+        Built from the normalized text and fields, so reflowed lines,
+        spacing or case changes do not alter it while any edit does.
+        """
+        content = [
+            normalize_key(self.original_text),
+            [normalize_key(author) for author in self.authors],
+            self.year,
+            normalize_key(self.title) if self.title else None,
+            self.doi.lower() if self.doi else None,
+        ]
+        payload = json.dumps(content, ensure_ascii=False).encode('utf-8')
+        return hashlib.sha1(payload).hexdigest()
+
+    def to_dict(self):
+        return {
+            'original_text': self.original_text,
+            'authors': self.authors,
+            'year': self.year,
+            'title': self.title,
+            'doi': self.doi
+        }
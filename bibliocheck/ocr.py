@@ -0,0 +1,134 @@
+"""
+OCR of scanned PDF pages with a local Tesseract.
+
+Enabled by ``FEATURES["enable_pdf_ocr"]``; needs ``pytesseract`` and
+Pillow (the ``ocr`` extra) and the ``tesseract`` binary. Only pages whose
+text layer is (nearly) empty are recognized. The scanned image embedded
+in each such page is OCRed in a process pool, one page per core, and the
+output is cached by the image's hash so a document is never recognized
+twice.
+"""
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import config
+from bibliocheck.cache import LookupCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = "ocr"
+
+_warned = False
+
+
+def enabled() -> bool:
+    """Whether OCR is switched on and its dependencies are importable."""
+    global _warned
+    if not config.FEATURES.get("enable_pdf_ocr"):
+        return False
+    try:
+        import pytesseract  # noqa: F401
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        if not _warned:
+            logger.warning("OCR abilitato ma pytesseract/Pillow non installati")
+            _warned = True
+        return False
+    return True
+
+
+def needs_ocr(text: str) -> bool:
+    """Whether a page's text layer is too thin to be real text."""
+    return len(''.join(text.split())) < config.OCR_MIN_TEXT_CHARS
+
+
+def page_image(page) -> Optional[bytes]:
+    """The encoded bytes of the largest image on a PDF page (the scan), if any."""
+    try:
+        images = page.images
+    except Exception as e:
+        logger.debug("Immagini della pagina non leggibili: %s", e)
+        return None
+    datas = [image.data for image in images if image.data]
+    return max(datas, key=len) if datas else None
+
+
+def _init_worker() -> None:
+    # One Tesseract thread per process: the pool already uses every core
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def ocr_image(data: bytes) -> str:
+    """Recognize the text in an encoded image (runs in a worker process)."""
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return pytesseract.image_to_string(image, lang=config.OCR_LANGUAGES)
+
+
+def ocr_pages(pages, max_workers: Optional[int] = None) -> List[str]:
+    """OCR PDF pages in order; pages without an image yield ``""``.
+
+    Cached pages cost nothing; the others are recognized in a process pool
+    (serially inside a worker process, e.g. during batch parsing, where the
+    cores are already busy).
+    """
+    cache = get_ocr_cache()
+    texts: List[Optional[str]] = []
+    todo = {}
+    for position, page in enumerate(pages):
+        data = page_image(page)
+        if data is None:
+            texts.append("")
+            continue
+        key = f"{config.OCR_LANGUAGES}:{hashlib.sha256(data).hexdigest()}"
+        cached = cache.get(CACHE_NAMESPACE, key) if cache is not None else None
+        texts.append(cached)
+        if cached is None:
+            todo[position] = (key, data)
+
+    if todo:
+        images = [data for _, data in todo.values()]
+        try:
+            if len(images) == 1 or multiprocessing.parent_process() is not None:
+                recognized = [ocr_image(data) for data in images]
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers,
+                                         initializer=_init_worker) as pool:
+                    recognized = list(pool.map(ocr_image, images))
+        except Exception as e:
+            logger.error("Errore OCR: %s", e)
+            recognized = [""] * len(images)
+        for (position, (key, _)), text in zip(todo.items(), recognized):
+            texts[position] = text
+            if cache is not None and text:
+                cache.set(CACHE_NAMESPACE, key, text)
+
+    return [text or "" for text in texts]
+
+
+_cache: Optional[LookupCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache() -> Optional[LookupCache]:
+    """Return the process-wide OCR cache, or ``None`` when caching is disabled."""
+    global _cache
+    if not config.CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LookupCache(
+                path=config.OCR_CACHE_PATH,
+                ttl_hours=config.OCR_CACHE_TTL_HOURS,
+                max_size=config.OCR_CACHE_MAX_SIZE,
+            )
+        return _cache
@@ -0,0 +1,265 @@
+"""
+Bibliography section detection and citation parsing.
+
+A bibliography is parsed in three steps: the citation style is detected
+once per document, physical lines are joined into reference entries
+(PDF extraction wraps long references over several lines), and each entry
+is parsed with patterns compiled at import time.
+"""
+
+import re
+from typing import Iterator, List, Optional
+
+import config
+from bibliocheck.cache import normalize_key
+from bibliocheck.models import Citation
+from bibliocheck.providers.crossref import normalize_doi
+
+# Pattern per identificare inizio bibliografia, compilati una volta sola
+BIBLIOGRAPHY_HEADINGS = [re.compile(pattern) for pattern in config.BIBLIOGRAPHY_PATTERNS]
+
+# Lines sampled from the top of a bibliography to detect its style
+STYLE_SAMPLE_LINES = 200
+
+STYLE_PATTERNS = {
+    style: [re.compile(pattern) for pattern in patterns]
+    for style, patterns in config.CITATION_PATTERNS.items()
+}
+
+# Inizio di una voce numerata: "[12] ..." (IEEE) oppure "12. ..." / "12) ..."
+BRACKET_MARKER = re.compile(r'^\[\d{1,4}\]\s*')
+NUMBER_MARKER = re.compile(r'^\d{1,4}[.)]\s+(?=\S)')
+# Inizio di una voce autore-anno: "Rossi, M." / "Rossi, Mario" / "van Dijk, T."
+AUTHOR_START = re.compile(
+    r"^(?:(?:van|von|de|del|della|di|da|le|la)\s+)?[A-ZÀ-ÖØ-Þ][^\W\d_'’\-]*(?:['’\-][^\W\d_]+)*"
+    r",\s+[A-ZÀ-ÖØ-Þ]"
+)
+# Heading on a line of its own, optionally numbered ("7. References", "IV References")
+HEADING_LINE = re.compile(
+    r'(?i)^(?:(?:\d+(?:\.\d+)*|[ivxlc]+)\.?\s+)?(?:references?|bibliography|bibliografia|bibliographie|literatur|'
+    r'works?\s+cited|literature\s+cited|riferimenti\s+bibliografici?)\s*:?$'
+)
+# Field titles at least this long (normalized) are matched inside a parsed entry's text
+MIN_TITLE_IN_TEXT = 20
+PAGE_NUMBER_LINE = re.compile(r'^(?:page\s+|pag\.\s*)?\d{1,4}$', re.IGNORECASE)
+ENTRY_END = re.compile(r'(?:[.!?]["”’)\]]?|10\.\d{4,9}/\S+|https?://\S+)$')
+
+YEAR = re.compile(r'\b(19|20)\d{2}\b')
+DOI = re.compile(r'10\.\d+/[^\s]+')
+# "Cognome, N." / "Cognome, Nome" all'inizio
+AUTHOR_SURNAME_FIRST = re.compile(
+    r"^((?:(?:van|von|de|del|della|di|da|le|la)\s+)?[A-ZÀ-ÖØ-Þ][^\W\d_'’\-]*(?:['’\-][^\W\d_]+)*"
+    r",\s(?:[A-ZÀ-ÖØ-Þ]\.(?:\s?-?[A-ZÀ-ÖØ-Þ]\.)*|[A-ZÀ-ÖØ-Þ][^\W\d_]+))"
+)
+# "N. Cognome" all'inizio (IEEE)
+AUTHOR_INITIALS_FIRST = re.compile(r'^((?:[A-Z]\.\s?(?:-?[A-Z]\.\s?)?)+)\s*([A-Z][A-Za-z\'’\-]+)')
+# "Cognome NN," all'inizio (Vancouver)
+AUTHOR_VANCOUVER = re.compile(r"^([A-Z][A-Za-z'’\-]+)\s([A-Z]{1,3})[,.]")
+TITLE_QUOTED = re.compile(r'["“]([^"“”]+)["”]')
+TITLE_AFTER_YEAR = re.compile(r'\((?:19|20)\d{2}[a-z]?\)\.?\s+([^.?!]+[.?!]?)')
+TITLE_SENTENCE = re.compile(r'\.?\s([A-Z][^.]+)\.')
+
+
+def _heading_offsets(text, pattern) -> Iterator[int]:
+    """Start of each line where ``pattern`` matches a standalone heading.
+
+    A match inside a longer line (a reference wrapped on the word
+    "references") is not a heading.
+    """
+    for match in pattern.finditer(text):
+        start = text.rfind('\n', 0, match.start()) + 1
+        end = text.find('\n', match.start())
+        if HEADING_LINE.match(text[start:end if end >= 0 else len(text)].strip()):
+            yield start
+
+
+def find_bibliography_heading(text) -> Optional[int]:
+    """Offset of the last bibliography heading in ``text``, or ``None``.
+
+    The last occurrence is used because a table of contents earlier in the
+    same text may list the heading too.
+    """
+    return max((offset for pattern in BIBLIOGRAPHY_HEADINGS
+                for offset in _heading_offsets(text, pattern)), default=None)
+
+# Funzione per trovare la sezione bibliografia
+def find_bibliography_section(text):
+    for pattern in BIBLIOGRAPHY_HEADINGS:
+        for offset in _heading_offsets(text, pattern):
+            # Restituisce dall'intestazione fino alla fine
+            return text[offset:]
+
+    # Se non trova pattern specifici, prende ultima parte del documento (70%)
+    return text[int(len(text) * 0.7):]
+
+# Funzione per estrarre citazioni da un testo completo
+def extract_citations(text):
+    return parse_citations(find_bibliography_section(text))
+
+
+def detect_citation_style(lines: List[str]) -> Optional[str]:
+    """Guess the document's citation style from its bibliography lines.
+
+    Only the first ``STYLE_SAMPLE_LINES`` lines are examined. Numbering
+    markers decide on their own (``[n]`` is IEEE, ``n.`` is Vancouver);
+    otherwise the style whose ``config.CITATION_PATTERNS`` match the most
+    lines wins. ``None`` when nothing matches.
+    """
+    lines = [line.strip() for line in lines[:STYLE_SAMPLE_LINES] if line.strip()]
+    if not lines:
+        return None
+
+    bracketed = sum(1 for line in lines if BRACKET_MARKER.match(line))
+    numbered = sum(1 for line in lines if NUMBER_MARKER.match(line))
+    if bracketed >= 3 and bracketed >= numbered:
+        return 'ieee'
+    if numbered >= 3:
+        return 'vancouver'
+
+    scores = {
+        style: sum(1 for line in lines if any(p.search(line) for p in patterns))
+        for style, patterns in STYLE_PATTERNS.items()
+    }
+    style, score = max(scores.items(), key=lambda item: item[1])
+    return style if score > 0 else None
+
+
+def _join(entry: str, line: str) -> str:
+    """Append a continuation line, undoing end-of-line hyphenation."""
+    if entry.endswith('-') and line[:1].islower():
+        return entry[:-1] + line
+    return f"{entry} {line}"
+
+
+def segment_references(bib_section: str, style: Optional[str] = None) -> List[str]:
+    """Split a bibliography into reference entries, joining wrapped lines.
+
+    Entry boundaries are numbering markers for numbered styles; otherwise a
+    line starts a new entry when it is less indented than the lines around
+    it (hanging indent) or when it opens with an author name and the
+    previous entry already ended.
+    """
+    raw_lines = [
+        line.rstrip() for line in bib_section.split('\n')
+        if line.strip()
+        and not HEADING_LINE.match(line.strip())
+        and not PAGE_NUMBER_LINE.match(line.strip())
+    ]
+    if style is None:
+        style = detect_citation_style(raw_lines)
+
+    if style == 'ieee':
+        marker = BRACKET_MARKER
+    elif style == 'vancouver':
+        marker = NUMBER_MARKER
+    else:
+        marker = None
+
+    indents = [len(line) - len(line.lstrip()) for line in raw_lines]
+    hanging = marker is None and len(set(indents)) > 1
+    base_indent = min(indents) if indents else 0
+
+    entries = []
+    current = None
+    for line, indent in zip(raw_lines, indents):
+        line = line.strip()
+        if current is None:
+            starts = True
+        elif marker is not None:
+            starts = bool(marker.match(line))
+        elif hanging:
+            starts = indent == base_indent
+        else:
+            starts = bool(AUTHOR_START.match(line)) and bool(ENTRY_END.search(current))
+
+        if starts:
+            if current is not None:
+                entries.append(current)
+            current = line
+        else:
+            current = _join(current, line)
+
+    if current is not None:
+        entries.append(current)
+    return entries
+
+
+def _parse_authors(body: str) -> List[str]:
+    author_match = AUTHOR_SURNAME_FIRST.search(body)
+    if author_match:
+        return [author_match.group().strip()]
+    author_match = AUTHOR_INITIALS_FIRST.search(body)
+    if author_match:
+        # "J. Smith" -> "Smith, J." come negli altri stili
+        return [f"{author_match.group(2)}, {author_match.group(1).strip()}"]
+    author_match = AUTHOR_VANCOUVER.search(body)
+    if author_match:
+        return [f"{author_match.group(1)}, {author_match.group(2)}"]
+    return []
+
+
+def _parse_title(body: str) -> Optional[str]:
+    for pattern in (TITLE_QUOTED, TITLE_AFTER_YEAR):
+        title_match = pattern.search(body)
+        if title_match and len(title_match.group(1)) > 10:
+            return title_match.group(1).strip().rstrip('.,').strip()
+    for title_match in TITLE_SENTENCE.finditer(body):
+        if len(title_match.group(1)) > 10:
+            return title_match.group(1).strip()
+    return None
+
+
+def parse_reference(entry: str) -> Citation:
+    """Parse the fields of a single reference entry."""
+    body = BRACKET_MARKER.sub('', entry, count=1)
+    body = NUMBER_MARKER.sub('', body, count=1)
+
+    year_match = YEAR.search(body)
+    doi_match = DOI.search(body)
+
+    return Citation(
+        original_text=entry,
+        authors=_parse_authors(body),
+        year=year_match.group() if year_match else None,
+        title=_parse_title(body),
+        doi=doi_match.group() if doi_match else None
+    )
+
+
+def is_reference(entry: str) -> bool:
+    # Criteri base per identificare una citazione:
+    # - Lunghezza ragionevole
+    # - Contiene numeri (anni)
+    # - Contiene punto (fine frase)
+    return len(entry) > 30 and any(char.isdigit() for char in entry) and '.' in entry
+
+# Funzione per estrarre le citazioni da una sezione bibliografia già isolata
+def parse_citations(bib_section, style=None):
+    entries = segment_references(bib_section, style)
+    return [parse_reference(entry) for entry in entries if is_reference(entry)]
+
+
+def merge_field_citations(field_citations: List[Citation], bib_section: str) -> List[Citation]:
+    """Reference-manager citations plus the hand-typed ones of the same bibliography.
+
+    The field citations are exact and kept as they are. The bibliography
+    text is parsed too, and a parsed entry is dropped when it duplicates a
+    field citation: same DOI, same normalized title, or a long field
+    title found in its text (for entries whose title the parser missed).
+    """
+    parsed = parse_citations(bib_section) if bib_section.strip() else []
+    if not field_citations:
+        return parsed
+    dois = {normalize_doi(c.doi) for c in field_citations if c.doi}
+    titles = {normalize_key(c.title) for c in field_citations if c.title}
+    long_titles = [title for title in titles if len(title) >= MIN_TITLE_IN_TEXT]
+
+    def duplicate(citation):
+        if citation.doi and normalize_doi(citation.doi) in dois:
+            return True
+        if citation.title and normalize_key(citation.title) in titles:
+            return True
+        text = normalize_key(citation.original_text)
+        return any(title in text for title in long_titles)
+
+    return list(field_citations) + [c for c in parsed if not duplicate(c)]
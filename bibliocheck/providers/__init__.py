@@ -0,0 +1,31 @@
+"""
+Academic database clients.
+
+Each module wraps one database behind the ``Provider`` interface;
+``get_providers`` instantiates those enabled in ``config``.
+"""
+
+import importlib
+from typing import List
+
+import config
+
+# db_id -> (module, provider class)
+PROVIDERS = {
+    "crossref": ("crossref", "CrossRefProvider"),
+    "pubmed": ("pubmed", "PubMedProvider"),
+    "arxiv": ("arxiv", "ArxivProvider"),
+    "scopus": ("scopus", "ScopusProvider"),
+    "ieee": ("ieee", "IEEEProvider"),
+}
+
+
+def get_providers(transport) -> List:
+    """Providers for every enabled database, in ``config`` order."""
+    providers = []
+    for db_id in config.get_enabled_databases():
+        if db_id in PROVIDERS:
+            module_name, class_name = PROVIDERS[db_id]
+            module = importlib.import_module(f"{__name__}.{module_name}")
+            providers.append(getattr(module, class_name)(transport))
+    return providers
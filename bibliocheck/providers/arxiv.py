@@ -0,0 +1,93 @@
+"""
+arXiv client (Atom API).
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.providers.base import (
+    Provider, first_author, parse_year, surname_first, title_terms
+)
+
+DB_ID = "arxiv"
+BASE_URL = config.FREE_DATABASES[DB_ID]["base_url"]
+
+NAMESPACES = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom',
+}
+
+# "arXiv:1706.03762v5" or "arxiv.org/abs/1706.03762"
+ARXIV_ID = re.compile(r'(?i)(?:arxiv:\s*|arxiv\.org/(?:abs|pdf)/)(\d{4}\.\d{4,5})')
+PREPRINT = re.compile(r'(?i)\barxiv\b|\bpreprint\b')
+
+
+def arxiv_id(citation) -> Optional[str]:
+    match = ARXIV_ID.search(citation.original_text)
+    return match.group(1) if match else None
+
+
+def _text(entry, path: str) -> str:
+    return ' '.join((entry.findtext(path, default='', namespaces=NAMESPACES)).split())
+
+
+def parse_feed(xml: str) -> List[Dict]:
+    """Convert an Atom feed into records in the common result format."""
+    try:
+        root = ET.fromstring(xml)
+    except ET.ParseError:
+        return []
+    results = []
+    for entry in root.findall('atom:entry', NAMESPACES):
+        title = _text(entry, 'atom:title')
+        # Lookups by unknown id return a single entry titled "Error"
+        if not title or title == 'Error':
+            continue
+        authors = [
+            surname_first(_text(author, 'atom:name'))
+            for author in entry.findall('atom:author', NAMESPACES)[:3]
+        ]
+        results.append({
+            'title': title,
+            'authors': authors,
+            'year': parse_year(_text(entry, 'atom:published')),
+            'journal': _text(entry, 'arxiv:journal_ref') or None,
+            'doi': _text(entry, 'arxiv:doi'),
+            'database': 'arXiv'
+        })
+    return results
+
+
+class ArxivProvider(Provider):
+    """Preprints; asked first when the reference mentions arXiv."""
+
+    db_id = DB_ID
+
+    def is_relevant(self, citation) -> bool:
+        return bool(PREPRINT.search(citation.original_text))
+
+    def query(self, citation) -> str:
+        identifier = arxiv_id(citation)
+        if identifier:
+            return f"id:{identifier}"
+        parts = []
+        title = title_terms(citation)
+        if title:
+            parts.append(f'ti:"{title}"')
+        author = first_author(citation)
+        if author:
+            parts.append(f'au:"{author}"')
+        return ' AND '.join(parts)
+
+    async def search(self, citation, max_results: int = 3) -> List[Dict]:
+        query = self.query(citation)
+        if not query:
+            return []
+        if query.startswith('id:'):
+            params = {'id_list': query[3:]}
+        else:
+            params = {'search_query': query, 'start': 0, 'max_results': max_results}
+        xml = await self.transport.get_text(DB_ID, BASE_URL, params=params)
+        return parse_feed(xml or '')
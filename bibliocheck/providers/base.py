@@ -0,0 +1,66 @@
+"""
+Common interface of the academic database clients.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bibliocheck.cache import normalize_key
+
+
+def first_author(citation) -> Optional[str]:
+    """Family name of the citation's first author ("Rossi, M." -> "Rossi")."""
+    if not citation.authors:
+        return None
+    return citation.authors[0].split(',')[0].strip() or None
+
+
+def title_terms(citation) -> Optional[str]:
+    """Title reduced to plain words, safe inside any search syntax."""
+    if not citation.title or len(citation.title) <= 5:
+        return None
+    return normalize_key(citation.title) or None
+
+
+def surname_first(name: str) -> str:
+    """Turn "Ashish Vaswani" into "Vaswani, Ashish" like the other records."""
+    parts = name.split()
+    if len(parts) < 2:
+        return name.strip()
+    return f"{parts[-1]}, {' '.join(parts[:-1])}"
+
+
+def parse_year(value) -> Optional[str]:
+    match = re.search(r'\b(?:19|20)\d{2}\b', str(value or ''))
+    return match.group() if match else None
+
+
+class Provider:
+    """A searchable academic database.
+
+    Subclasses set ``db_id`` (the key in ``config``) and implement
+    ``search``, returning records in the common result format (``title``,
+    ``authors``, ``year``, ``journal``, ``doi``, ``database``). ``query``
+    is the string the results are cached under, so it must capture
+    everything ``search`` sends.
+    """
+
+    db_id = ""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    def is_relevant(self, citation) -> bool:
+        """Whether the citation looks like something this database indexes.
+
+        Relevant providers are asked first; the others only when no
+        confident match is found.
+        """
+        return False
+
+    def query(self, citation) -> str:
+        raise NotImplementedError
+
+    async def search(self, citation, max_results: int = 3) -> List[Dict]:
+        """Candidate records for ``citation``; raises ``TransportError`` on failure."""
+        raise NotImplementedError
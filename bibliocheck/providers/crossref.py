@@ -0,0 +1,197 @@
+"""
+CrossRef works API client.
+
+Searches follow a staged plan: a field-targeted query first
+(``query.bibliographic`` on the title, ``query.author``, a publication
+year window), then broader queries with more rows only while the best
+match scores below ``STATUS_THRESHOLDS["uncertain"]``. Every request
+projects the response onto the fields ``parse_item`` reads (``select``).
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+from bibliocheck.providers.base import Provider
+
+DB_ID = "crossref"
+BASE_URL = config.FREE_DATABASES[DB_ID]["base_url"]
+
+# Work fields read by parse_item; everything else is left out of responses
+SELECT_FIELDS = "DOI,title,author,published-print,published-online,issued,container-title"
+
+_DOI_PREFIX = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.IGNORECASE)
+
+
+def normalize_doi(doi: str) -> str:
+    """Canonical form of a DOI: no resolver prefix or trailing punctuation, lowercase."""
+    doi = _DOI_PREFIX.sub('', doi.strip()).rstrip('.,;:>"\'')
+    # Closing brackets belong to the DOI only when they are balanced
+    for opening, closing in (('(', ')'), ('[', ']')):
+        while doi.endswith(closing) and doi.count(closing) > doi.count(opening):
+            doi = doi[:-1].rstrip('.,;:')
+    return doi.lower()
+
+
+def parse_item(item: Dict) -> Optional[Dict]:
+    """Convert a CrossRef work record into the common result format."""
+    try:
+        title = ' '.join(item.get('title', ['']))
+
+        authors = []
+        for author in item.get('author', [])[:3]:
+            if 'family' in author:
+                name = author['family']
+                if 'given' in author:
+                    name += f", {author['given']}"
+                authors.append(name)
+
+        year = None
+        for field in ('published-print', 'published-online', 'issued'):
+            try:
+                value = item[field]['date-parts'][0][0]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if value:
+                year = str(value)
+                break
+
+        journal = (item.get('container-title') or [None])[0]
+        doi = item.get('DOI', '')
+
+        return {
+            'title': title,
+            'authors': authors,
+            'year': year,
+            'journal': journal,
+            'doi': doi,
+            'database': 'CrossRef'
+        }
+    except Exception:
+        return None
+
+
+def parse_items(data: Dict) -> List[Dict]:
+    """Extract the parsed result list from a CrossRef ``/works`` response."""
+    results = []
+    if 'message' in data and 'items' in data['message']:
+        for item in data['message']['items']:
+            parsed = parse_item(item)
+            if parsed is not None:
+                results.append(parsed)
+    return results
+
+
+def _polite(params: Dict) -> Dict:
+    """Add the contact address that routes requests to CrossRef's polite pool."""
+    if config.CONTACT_EMAIL:
+        params['mailto'] = config.CONTACT_EMAIL
+    return params
+
+
+async def search(transport, query: str, max_results: int = 3) -> List[Dict]:
+    """Free-text search over ``/works``."""
+    return await search_works(transport, {'query': query}, max_results)
+
+
+async def search_works(transport, params: Dict, max_results: int = 3) -> List[Dict]:
+    """Run one ``/works`` query (``query.*``/``filter`` params), projected on ``SELECT_FIELDS``."""
+    params = dict(params, rows=max_results, sort='relevance', select=SELECT_FIELDS)
+    data = await transport.get_json(DB_ID, BASE_URL, params=_polite(params))
+    return parse_items(data)
+
+
+def plan_queries(citation, max_results: int = 3) -> List[Tuple[Dict, int]]:
+    """Query stages for a citation, narrowest first, as ``(params, rows)`` pairs.
+
+    1. title as ``query.bibliographic`` plus ``query.author`` and a year
+       window of ``year_tolerance`` around the cited year;
+    2. the same fields in one bibliographic query, without the year
+       filter (finds the work when the cited year is wrong);
+    3. the whole reference string, with ``CROSSREF_BROAD_ROWS`` rows.
+    """
+    title = citation.title if citation.title and len(citation.title) > 5 else None
+    author = citation.authors[0].split(',')[0].strip() if citation.authors else None
+    stages = []
+
+    if title:
+        params = {'query.bibliographic': title}
+        if author:
+            params['query.author'] = author
+        if citation.year and citation.year.isdigit():
+            tolerance = config.SIMILARITY_THRESHOLDS["year_tolerance"]
+            year = int(citation.year)
+            params['filter'] = (f"from-pub-date:{year - tolerance},"
+                                f"until-pub-date:{year + tolerance}")
+        stages.append((params, max_results))
+
+        if author or citation.year:
+            relaxed = ' '.join(part for part in (title, author, citation.year) if part)
+            stages.append(({'query.bibliographic': relaxed}, max_results))
+
+    stages.append(({'query.bibliographic': citation.original_text}, config.CROSSREF_BROAD_ROWS))
+    return stages
+
+
+async def resolve_dois(transport, dois: Iterable[str]) -> Dict[str, Dict]:
+    """Fetch the exact records for several DOIs in one request.
+
+    ``dois`` must already be normalized. The result maps each DOI that
+    resolved to its parsed record; DOIs missing from the map do not exist.
+    """
+    dois = list(dois)
+    # The filter syntax is comma separated, so DOIs containing commas are
+    # fetched one by one through /works/{doi}
+    plain = [doi for doi in dois if ',' not in doi]
+    records = {}
+
+    if plain:
+        params = {
+            'filter': ','.join(f'doi:{doi}' for doi in plain),
+            'rows': len(plain),
+            'select': SELECT_FIELDS
+        }
+        data = await transport.get_json(DB_ID, BASE_URL, params=_polite(params))
+        for record in parse_items(data):
+            records[normalize_doi(record['doi'])] = record
+
+    for doi in dois:
+        if ',' in doi:
+            data = await transport.get_json(
+                DB_ID, f"{BASE_URL}/{doi}", params=_polite({}), allow_404=True
+            )
+            record = parse_item(data.get('message', {})) if data else None
+            if record is not None:
+                records[doi] = record
+
+    return records
+
+
+class CrossRefProvider(Provider):
+    """General-purpose search, asked first for every citation."""
+
+    db_id = DB_ID
+
+    def is_relevant(self, citation) -> bool:
+        return True
+
+    def query(self, citation) -> str:
+        stages = plan_queries(citation)
+        return ' | '.join(
+            ' '.join(f"{key}={value}" for key, value in sorted(params.items())) + f" rows={rows}"
+            for params, rows in stages
+        )
+
+    async def search(self, citation, max_results: int = 3) -> List[Dict]:
+        """Run the query stages until one yields a match above "uncertain"."""
+        from bibliocheck.matching import evaluate_candidates
+
+        candidates = {}
+        for params, rows in plan_queries(citation, max_results):
+            for record in await search_works(self.transport, params, rows):
+                candidates.setdefault(record['doi'] or record['title'], record)
+            if candidates:
+                best = evaluate_candidates(citation, list(candidates.values()))
+                if best['score'] >= config.STATUS_THRESHOLDS["uncertain"]:
+                    break
+        return list(candidates.values())
@@ -0,0 +1,95 @@
+"""
+PubMed client (NCBI E-utilities: esearch + esummary).
+"""
+
+import re
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.providers.base import Provider, first_author, parse_year, title_terms
+
+DB_ID = "pubmed"
+BASE_URL = config.FREE_DATABASES[DB_ID]["base_url"]
+
+# Journal and subject words typical of biomedical references
+BIOMEDICAL = re.compile(
+    r'\b(?:PMID|PubMed|Lancet|BMJ|JAMA|N\s?Engl\s?J|PLoS|Cell|Med|Medicine|Medical|'
+    r'Clin\w*|Biol\w*|Pharm\w*|Neuro\w*|Cancer|Oncol\w*|Epidemiol\w*|Health|Surg\w*|'
+    r'Pediatr\w*|Cardiol\w*|Immunol\w*|Genet\w*|Nurs\w*|Psychiatr\w*)\b'
+)
+
+
+def _params(params: Dict) -> Dict:
+    params.update({'db': 'pubmed', 'retmode': 'json', 'tool': 'bibliocheck'})
+    if config.CONTACT_EMAIL:
+        params['email'] = config.CONTACT_EMAIL
+    return params
+
+
+def parse_summary(summary: Dict) -> Optional[Dict]:
+    """Convert an esummary document into the common result format."""
+    try:
+        authors = []
+        for author in summary.get('authors', [])[:3]:
+            # "Smith JA" -> "Smith, JA"
+            name, _, initials = author.get('name', '').rpartition(' ')
+            authors.append(f"{name}, {initials}" if name else initials)
+
+        doi = ''
+        for article_id in summary.get('articleids', []):
+            if article_id.get('idtype') == 'doi':
+                doi = article_id.get('value', '')
+                break
+
+        return {
+            'title': summary.get('title', '').rstrip('.'),
+            'authors': authors,
+            'year': parse_year(summary.get('pubdate')),
+            'journal': summary.get('fulljournalname') or summary.get('source'),
+            'doi': doi,
+            'database': 'PubMed'
+        }
+    except Exception:
+        return None
+
+
+class PubMedProvider(Provider):
+    """Biomedical literature; asked first for references that look biomedical."""
+
+    db_id = DB_ID
+
+    def is_relevant(self, citation) -> bool:
+        return bool(BIOMEDICAL.search(citation.original_text))
+
+    def query(self, citation) -> str:
+        parts = []
+        title = title_terms(citation)
+        if title:
+            parts.append(title)
+        author = first_author(citation)
+        if author:
+            parts.append(f"{author}[Author]")
+        return ' AND '.join(parts)
+
+    async def search(self, citation, max_results: int = 3) -> List[Dict]:
+        term = self.query(citation)
+        if not term:
+            return []
+        data = await self.transport.get_json(
+            DB_ID, f"{BASE_URL}/esearch.fcgi",
+            params=_params({'term': term, 'retmax': max_results})
+        )
+        ids = data.get('esearchresult', {}).get('idlist', [])
+        if not ids:
+            return []
+
+        data = await self.transport.get_json(
+            DB_ID, f"{BASE_URL}/esummary.fcgi", params=_params({'id': ','.join(ids)})
+        )
+        summaries = data.get('result', {})
+        results = []
+        for uid in summaries.get('uids', []):
+            record = parse_summary(summaries.get(uid, {}))
+            if record is not None:
+                results.append(record)
+        return results
@@ -0,0 +1,60 @@
+"""
+Scopus Search API client (API key required).
+"""
+
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.providers.base import Provider, first_author, parse_year, title_terms
+
+DB_ID = "scopus"
+BASE_URL = config.PREMIUM_DATABASES[DB_ID]["base_url"]
+
+
+def parse_entry(entry: Dict) -> Optional[Dict]:
+    """Convert a search result entry into the common result format."""
+    # An empty result set comes back as a single entry carrying "error"
+    if 'error' in entry or not entry.get('dc:title'):
+        return None
+    creator = entry.get('dc:creator', '')
+    # Only the first author is returned: "Smith J." -> "Smith, J."
+    name, _, initials = creator.rpartition(' ')
+    return {
+        'title': entry['dc:title'],
+        'authors': [f"{name}, {initials}" if name else creator] if creator else [],
+        'year': parse_year(entry.get('prism:coverDate')),
+        'journal': entry.get('prism:publicationName'),
+        'doi': entry.get('prism:doi', ''),
+        'database': 'Scopus'
+    }
+
+
+class ScopusProvider(Provider):
+    """Multidisciplinary index, asked only when the first providers are not conclusive."""
+
+    db_id = DB_ID
+
+    def query(self, citation) -> str:
+        parts = []
+        title = title_terms(citation)
+        if title:
+            parts.append(f"TITLE({title})")
+        author = first_author(citation)
+        if author:
+            parts.append(f"AUTHLASTNAME({author})")
+        return ' AND '.join(parts)
+
+    async def search(self, citation, max_results: int = 3) -> List[Dict]:
+        query = self.query(citation)
+        if not query:
+            return []
+        data = await self.transport.get_json(
+            DB_ID, BASE_URL,
+            params={'query': query, 'count': max_results},
+            headers={
+                'X-ELS-APIKey': config.PREMIUM_DATABASES[DB_ID]['api_key'],
+                'Accept': 'application/json',
+            },
+        )
+        entries = data.get('search-results', {}).get('entry', [])
+        return [record for record in map(parse_entry, entries) if record is not None]
@@ -0,0 +1,74 @@
+"""
+Per-database token buckets.
+
+Each database gets one bucket refilled at the ``rate_limit`` declared in
+``config.py`` (requests per ``rate_period`` seconds, one second by default).
+Buckets are process-wide and thread-safe, so every event loop in the
+process - including concurrent Streamlit sessions - draws from the same
+quota.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+import config
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second.
+
+    ``acquire`` reserves a token immediately and sleeps only for the time
+    needed to pay it back, so waiters are served in arrival order without
+    holding a lock across ``await``.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` from the bucket and return the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _database_config(db_id: str) -> Dict:
+    return config.FREE_DATABASES.get(db_id) or config.PREMIUM_DATABASES.get(db_id) or {}
+
+
+def get_bucket(db_id: str) -> TokenBucket:
+    """Return the shared bucket for ``db_id``, creating it on first use."""
+    with _buckets_lock:
+        bucket = _buckets.get(db_id)
+        if bucket is None:
+            db_config = _database_config(db_id)
+            period = db_config.get("rate_period", 1)
+            limit = db_config.get("rate_limit")
+            if limit:
+                bucket = TokenBucket(limit / period, capacity=limit)
+            else:
+                bucket = TokenBucket(1.0 / config.DEFAULT_RATE_LIMIT_DELAY)
+            _buckets[db_id] = bucket
+        return bucket
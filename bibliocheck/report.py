@@ -0,0 +1,60 @@
+"""
+Verification summaries and downloadable JSON reports.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Every status a verification result can carry
+STATUSES = ('verified', 'error', 'not_found', 'uncertain', 'unavailable', 'unverified')
+
+
+def summarize(results: List[Dict]) -> Dict[str, int]:
+    """Count results per status in a single pass."""
+    counts = Counter(r['status'] for r in results)
+    return {status: counts.get(status, 0) for status in STATUSES}
+
+
+def build_report(results: List[Dict], filename: str, diff: Optional[Dict] = None) -> Dict:
+    """Build the report structure offered for download in the UI and written by the CLI.
+
+    ``diff`` is the comparison with the previous run of the same document
+    (see ``history.compare_with_last_run``), included when given.
+    """
+    summary = summarize(results)
+    total = len(results)
+
+    report_data = {
+        'metadata': {
+            'filename': filename,
+            'generated_at': datetime.now().isoformat(),
+            'total_citations': total,
+            'accuracy_percentage': (summary['verified'] / total * 100) if total > 0 else 0,
+            'reused_verdicts': sum(1 for r in results if r.get('reused'))
+        },
+        'summary': summary,
+        'detailed_results': []
+    }
+
+    for i, result in enumerate(results):
+        citation_data = {
+            'id': i + 1,
+            'original_text': result['citation'].original_text,
+            'status': result['status'],
+            'score': result['score'],
+            'errors': result['errors']
+        }
+
+        if result['best_match']:
+            citation_data['best_match'] = result['best_match']
+
+        if result.get('reused'):
+            citation_data['reused'] = True
+
+        report_data['detailed_results'].append(citation_data)
+
+    if diff is not None:
+        report_data['diff'] = diff
+
+    return report_data
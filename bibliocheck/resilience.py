@@ -0,0 +1,276 @@
+"""
+Tail-latency controls for database calls.
+
+Every provider call goes through ``call()``, which combines:
+
+* a per-database circuit breaker, process-wide like the token buckets:
+  when too many recent calls failed or were slow it opens and calls fail
+  fast (``CircuitOpenError``) for ``CIRCUIT_OPEN_SECONDS``, so the engine
+  fails over to the other providers or the cache instead of waiting out
+  every timeout; then a single probe call decides whether it closes again;
+* hedging: when a call is still running after the database's p95 latency,
+  an identical duplicate is started and the first answer wins;
+* a deadline per call, which the engine derives from the run budget.
+  Only the full ``CALL_TIMEOUT_MAX`` expiring (or a call already slower
+  than ``CIRCUIT_SLOW_CALL_SECONDS``) counts against the database: a
+  shorter deadline is the caller's budget running out, not a sign the
+  database is unhealthy, and must not cut off every other session;
+* throttling: when the server asks us to back off (``Throttled``), the
+  call stops, waits the requested delay outside its deadline and without
+  a hedge, and tries again, up to ``MAX_RETRIES`` times. A throttled call
+  is neither a failure nor a slow call for the breaker.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import config
+from bibliocheck.transport import RETRY_STATUSES, Throttled, TransportError, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(TransportError):
+    """The database's circuit breaker is open: the call was not attempted."""
+
+
+class DeadlineExceeded(TransportError):
+    """The call did not finish within its deadline."""
+
+
+class CircuitBreaker:
+    """Sliding-window circuit breaker that also tracks call latencies.
+
+    A call is "bad" if it failed or took longer than ``slow_call``
+    seconds; the breaker opens once at least ``min_calls`` of the last
+    ``window`` calls were seen and ``failure_rate`` of them were bad.
+    """
+
+    def __init__(self, db_id: str,
+                 window: int = config.CIRCUIT_WINDOW,
+                 min_calls: int = config.CIRCUIT_MIN_CALLS,
+                 failure_rate: float = config.CIRCUIT_FAILURE_RATE,
+                 slow_call: float = config.CIRCUIT_SLOW_CALL_SECONDS,
+                 open_seconds: float = config.CIRCUIT_OPEN_SECONDS):
+        self.db_id = db_id
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.trips = 0
+        self.hedges = 0
+        self._outcomes = deque(maxlen=window)  # True for a bad call
+        self._latencies = deque(maxlen=config.LATENCY_WINDOW)
+        self._opened = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now (takes the probe slot when half-open)."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def _trip(self) -> None:
+        self.state = OPEN
+        self._opened = time.monotonic()
+        self.trips += 1
+        logger.warning("%s: circuito aperto per %.0fs", self.db_id, self.open_seconds)
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            slow = latency > self.slow_call
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if slow:
+                    self._trip()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._record(slow)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                self._trip()
+                return
+            self._record(True)
+
+    def _record(self, bad: bool) -> None:
+        self._outcomes.append(bad)
+        if (self.state == CLOSED and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) >= self.failure_rate * len(self._outcomes)):
+            self._trip()
+
+    def release(self) -> None:
+        """Forget a call whose outcome is unknown (it was cancelled)."""
+        with self._lock:
+            self._probing = False
+
+    def p95(self) -> Optional[float]:
+        """95th percentile of recent successful call latencies, once enough are known."""
+        with self._lock:
+            if len(self._latencies) < config.HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'trips': self.trips,
+            'hedges': self.hedges,
+            'p95': self.p95(),
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(db_id: str) -> CircuitBreaker:
+    """Return the shared breaker for ``db_id``, creating it on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(db_id)
+        if breaker is None:
+            breaker = _breakers[db_id] = CircuitBreaker(db_id)
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """State, trips, hedges and p95 latency of every database used so far."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.db_id: breaker.stats() for breaker in breakers}
+
+
+async def hedged(fetch: Callable[[], Awaitable[Any]], timeout: float,
+                 hedge_after: Optional[float] = None, on_hedge: Optional[Callable] = None) -> Any:
+    """Await ``fetch()``, starting one duplicate after ``hedge_after`` seconds.
+
+    The first successful answer wins and the other call is cancelled; if
+    every call fails, the last error is raised. ``Throttled`` is raised as
+    soon as any call gets it, so no duplicate goes to a server that asked
+    us to back off. Raises ``DeadlineExceeded`` after ``timeout`` seconds.
+    """
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    hedge_at = loop.time() + hedge_after if hedge_after is not None and hedge_after < timeout else None
+    tasks = {asyncio.ensure_future(fetch())}
+    started = list(tasks)
+    error: Optional[BaseException] = None
+    try:
+        while tasks:
+            wake = min(end, hedge_at) if hedge_at is not None else end
+            done, tasks = await asyncio.wait(tasks, timeout=max(0.0, wake - loop.time()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+                if isinstance(error, Throttled):
+                    raise error
+            if not tasks:
+                break
+            if hedge_at is not None and loop.time() >= hedge_at:
+                hedge_at = None
+                duplicate = asyncio.ensure_future(fetch())
+                tasks.add(duplicate)
+                started.append(duplicate)
+                if on_hedge is not None:
+                    on_hedge()
+            elif loop.time() >= end:
+                raise DeadlineExceeded(f"nessuna risposta entro {timeout:.1f}s")
+        raise error
+    finally:
+        for task in started:
+            task.cancel()
+        await asyncio.gather(*started, return_exceptions=True)
+
+
+async def call(db_id: str, fetch: Callable[[], Awaitable[Any]], timeout: float,
+               deadline: Optional[float] = None) -> Any:
+    """Call a database through its circuit breaker, hedged, within ``timeout`` seconds.
+
+    Raises ``CircuitOpenError`` without calling when the breaker is open,
+    and ``TransportError`` (``DeadlineExceeded`` included) on failure. A
+    ``timeout`` below ``CALL_TIMEOUT_MAX`` is a budget share: expiring it
+    is not recorded as a failure unless the call was slow anyway.
+
+    ``timeout`` bounds each attempt; waits requested by the server come on
+    top of it, capped by ``RETRY_AFTER_MAX`` and, when given, by the
+    ``deadline`` (``time.monotonic()``) of the whole run: a wait that does
+    not fit raises ``DeadlineExceeded`` right away.
+    """
+    breaker = get_breaker(db_id)
+    for attempt in range(config.MAX_RETRIES + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"{db_id}: circuito aperto")
+        try:
+            return await _attempt(breaker, fetch, timeout)
+        except Throttled as e:
+            breaker.release()
+            if attempt == config.MAX_RETRIES:
+                raise
+            delay = e.retry_after if e.retry_after is not None else backoff_delay(attempt)
+            if deadline is not None:
+                remaining = deadline - time.monotonic() - delay
+                if remaining < config.CALL_TIMEOUT_MIN:
+                    raise DeadlineExceeded(
+                        f"{e}: attesa di {delay:.1f}s oltre il tempo disponibile"
+                    ) from None
+                timeout = min(timeout, remaining)
+            logger.info("%s - il server chiede di attendere %.1fs", e, delay)
+            await asyncio.sleep(delay)
+
+
+async def _attempt(breaker: CircuitBreaker, fetch: Callable[[], Awaitable[Any]],
+                   timeout: float) -> Any:
+    """One hedged attempt of ``call``, recorded on ``breaker`` unless throttled."""
+    hedge_after = breaker.p95() if config.HEDGE_ENABLED else None
+
+    def count_hedge():
+        breaker.hedges += 1
+
+    start = time.monotonic()
+    try:
+        value = await hedged(fetch, timeout, hedge_after, on_hedge=count_hedge)
+    except DeadlineExceeded as e:
+        if timeout >= config.CALL_TIMEOUT_MAX or time.monotonic() - start > breaker.slow_call:
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise DeadlineExceeded(f"{breaker.db_id}: {e}") from None
+    except Throttled:
+        # Left to call(), which releases the breaker and waits
+        raise
+    except TransportError as e:
+        if e.status is None or e.status in RETRY_STATUSES:
+            breaker.record_failure()
+        else:
+            # A rejected request (bad query, missing key) says nothing about health
+            breaker.release()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success(time.monotonic() - start)
+    return value
@@ -0,0 +1,214 @@
+"""
+Near-duplicate index of works resolved by earlier lookups.
+
+The exact-key lookup cache misses when the same reference is cited with
+different punctuation, casing, initials or abbreviations. Every record
+that verified a citation is therefore also kept here, indexed by
+character trigrams of its normalized title and by a first-author/year
+blocking key. Before going to the network the engine looks for a record
+of the same work among the nearest ones: the titles must be spelled the
+same up to punctuation, case and small typos (``same_title``), the first
+author and the year must agree, the DOI too when the citation has one, and
+no other record may come close. Everything else - a sequel, a "Part II",
+a reply titled after the paper it answers - goes to the providers.
+
+The index lives in memory in compact form: records as JSON strings,
+postings as ``array('I')`` of record ids. It grows incrementally as new
+records are resolved and is persisted to a SQLite file, reloaded on
+startup.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.cache import normalize_key
+from bibliocheck.index import first_author_key
+from bibliocheck.providers import crossref
+
+logger = logging.getLogger(__name__)
+
+NGRAM = 3
+
+# Words that tell apart parts, volumes and editions: digits and roman numerals up to 39
+_NUMERAL = re.compile(r'\d+|x{0,3}(?:ix|iv|v?i{1,3}|v)|x{1,3}')
+
+
+def title_ratio(a: str, b: str) -> float:
+    """Similarity of two titles as whole strings (0-1), 1.0 when they normalize equal."""
+    from bibliocheck.matching import _fuzz
+
+    a, b = normalize_key(a), normalize_key(b)
+    if a == b:
+        return 1.0
+    return _fuzz().ratio(a, b) / 100
+
+
+def same_title(a: str, b: str) -> bool:
+    """Whether two titles are spellings of the same title.
+
+    Besides a full-string ratio of at least ``RESOLVED_TITLE_RATIO``, both
+    must have the same number of words and the same numerals, so a word
+    added ("not") or a part number changed ("I" / "II", "2" / "21") is a
+    different title however long the rest is.
+    """
+    if title_ratio(a, b) < config.RESOLVED_TITLE_RATIO:
+        return False
+    a_words, b_words = normalize_key(a).split(), normalize_key(b).split()
+    return (len(a_words) == len(b_words)
+            and [w for w in a_words if _NUMERAL.fullmatch(w)]
+            == [w for w in b_words if _NUMERAL.fullmatch(w)])
+
+
+def same_work(citation, record: Dict) -> bool:
+    """Whether ``record`` is the work ``citation`` cites, judged offline.
+
+    Title, first author and year must all be known and agree; a DOI on the
+    citation must be the record's.
+    """
+    if not (citation.title and record.get('title')):
+        return False
+    if citation.doi and (crossref.normalize_doi(citation.doi)
+                         != crossref.normalize_doi(record.get('doi') or '')):
+        return False
+    author = first_author_key(citation.authors)
+    if not author or author != first_author_key(record.get('authors') or []):
+        return False
+    if not citation.year or str(citation.year)[:4] != str(record.get('year') or '')[:4]:
+        return False
+    return same_title(citation.title, record['title'])
+
+
+def title_ngrams(title: str) -> set:
+    """Character trigrams of a normalized title (padded, so short words count)."""
+    text = f" {normalize_key(title)} "
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def work_key(record: Dict) -> str:
+    """Identity of a work: its DOI, or normalized title, first author and year."""
+    if record.get('doi'):
+        return 'doi:' + crossref.normalize_doi(record['doi'])
+    return '|'.join((normalize_key(record.get('title') or ''),
+                     first_author_key(record.get('authors') or []),
+                     str(record.get('year') or '')))
+
+
+class ResolvedIndex:
+    """In-memory n-gram and blocking-key index over resolved records."""
+
+    def __init__(self, path: Optional[str] = config.RESOLVED_INDEX_PATH,
+                 max_size: int = config.RESOLVED_INDEX_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._records: List[str] = []
+        self._keys = set()
+        self._ngrams: Dict[str, array] = defaultdict(lambda: array('I'))
+        self._blocks: Dict[tuple, array] = defaultdict(lambda: array('I'))
+        self._lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS works (key TEXT PRIMARY KEY, record TEXT NOT NULL)"
+            )
+            for key, payload in self._conn.execute("SELECT key, record FROM works ORDER BY rowid"):
+                self._insert(key, payload, json.loads(payload))
+
+    def _insert(self, key: str, payload: str, record: Dict) -> None:
+        record_id = len(self._records)
+        self._records.append(payload)
+        self._keys.add(key)
+        for gram in title_ngrams(record['title']):
+            self._ngrams[gram].append(record_id)
+        author = first_author_key(record.get('authors') or [])
+        if author and record.get('year'):
+            self._blocks[(author, str(record['year']))].append(record_id)
+
+    def add(self, record: Dict) -> bool:
+        """Index a resolved record; ``False`` if it is already known or the index is full."""
+        if not record.get('title'):
+            return False
+        key = work_key(record)
+        payload = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if key in self._keys or len(self._records) >= self.max_size:
+                return False
+            self._insert(key, payload, record)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO works (key, record) VALUES (?, ?)", (key, payload)
+                )
+        return True
+
+    def candidates(self, citation, limit: int = config.RESOLVED_CANDIDATES) -> List[Dict]:
+        """Records sharing the most title trigrams with the citation, plus its author/year block.
+
+        Only the ``RESOLVED_PROBE_NGRAMS`` rarest trigrams of the title are
+        probed, so common ones ("the", "ing") never scan long postings.
+        """
+        with self._lock:
+            hits = Counter()
+            if citation.title:
+                postings = [self._ngrams[g] for g in title_ngrams(citation.title) if g in self._ngrams]
+                postings.sort(key=len)
+                for posting in postings[:config.RESOLVED_PROBE_NGRAMS]:
+                    hits.update(posting)
+            ids = [record_id for record_id, _ in hits.most_common(limit)]
+            author = first_author_key(citation.authors)
+            if author and citation.year:
+                ids.extend(self._blocks.get((author, str(citation.year)), array('I'))[:limit])
+            payloads = [self._records[record_id] for record_id in dict.fromkeys(ids)]
+        return [json.loads(payload) for payload in payloads]
+
+    def match(self, citation) -> Optional[Dict]:
+        """A verified result from a record of the same work, or ``None``.
+
+        The record must pass ``same_work`` and its title must beat every
+        other candidate's by ``RESOLVED_MATCH_MARGIN``; when in doubt the
+        citation is left to the providers.
+        """
+        from bibliocheck.matching import evaluate_record
+
+        if not citation.title:
+            return None
+        scored = sorted(((title_ratio(citation.title, record['title']), record)
+                         for record in self.candidates(citation)),
+                        key=lambda pair: pair[0], reverse=True)
+        if not scored or not same_work(citation, scored[0][1]):
+            return None
+        best, record = scored[0]
+        key = work_key(record)
+        runner_up = next((ratio for ratio, other in scored[1:] if work_key(other) != key), 0.0)
+        if best - runner_up < config.RESOLVED_MATCH_MARGIN:
+            return None
+        result = evaluate_record(citation, record)
+        return result if result['status'] == 'verified' else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+
+_index: Optional[ResolvedIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_resolved_index() -> Optional[ResolvedIndex]:
+    """Return the process-wide index, or ``None`` when disabled."""
+    global _index
+    if not config.RESOLVED_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = ResolvedIndex()
+        return _index
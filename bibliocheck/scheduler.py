@@ -0,0 +1,33 @@
+"""
+Priority order of a verification run.
+
+A run is bounded by a wall-clock budget rather than by truncating the
+bibliography, so the order in which citations are verified decides what
+gets checked when time is short. Citations with a DOI come first (one
+batched lookup settles them), then those with missing fields (the likely
+errors), then the rest, in document order within each tier. The engine
+starts lookups in this order and gives each one a fair share of the
+budget left; citations still unchecked when it runs out are returned as
+``'unverified'`` so a follow-up run can pick them up.
+"""
+
+from typing import List
+
+from bibliocheck.models import Citation
+
+# Priority tiers, lowest first
+DOI_TIER, INCOMPLETE_TIER, COMPLETE_TIER = 0, 1, 2
+
+
+def priority(citation: Citation) -> int:
+    """Tier of a citation: DOI-bearing, incomplete, or complete."""
+    if citation.doi:
+        return DOI_TIER
+    if not (citation.authors and citation.year and citation.title):
+        return INCOMPLETE_TIER
+    return COMPLETE_TIER
+
+
+def schedule(citations: List[Citation]) -> List[int]:
+    """Positions of ``citations`` in the order they should be verified."""
+    return sorted(range(len(citations)), key=lambda i: priority(citations[i]))
@@ -0,0 +1,379 @@
+"""
+HTTP API service.
+
+An aiohttp application for programmatic clients (LMS, institutional
+repositories)::
+
+    POST /v1/verifications               JSON {"citations": [...]} or multipart "file"
+    GET  /v1/verifications/{id}          progress and the results so far
+    GET  /v1/verifications/{id}/stream   results as NDJSON, one line per citation
+    GET  /v1/health                      queue depth, coalescing and breaker stats
+
+Citations of every submission go into one bounded queue; worker
+coroutines drain it into shared batches of up to ``API_BATCH_SIZE``
+citations, so concurrent clients share DOI batches, lookups and rate
+limits in a single engine run. When the queue cannot take a whole
+submission the service answers ``503`` with ``Retry-After`` at once, so
+overload degrades into quick refusals rather than timeouts.
+
+Run it with ``bibliocheck-server --port 8080``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import config
+from bibliocheck.coalesce import get_flights
+from bibliocheck.history import stored_result
+from bibliocheck.models import Citation
+from bibliocheck.report import summarize
+
+logger = logging.getLogger(__name__)
+
+CITATION_FIELDS = ('original_text', 'authors', 'year', 'title', 'doi')
+# A citation needs at least one of these to be looked up
+TEXT_FIELDS = ('original_text', 'title', 'doi')
+
+
+class Overloaded(Exception):
+    """The service cannot take more work right now."""
+
+
+def citation_from_json(item) -> Citation:
+    """A citation from a reference string or a dict of citation fields."""
+    from bibliocheck.parsing import parse_reference
+
+    if isinstance(item, str):
+        return parse_reference(item)
+    if not isinstance(item, dict):
+        raise ValueError("ogni citazione deve essere una stringa o un oggetto")
+    fields = {key: item[key] for key in CITATION_FIELDS if item.get(key)}
+    if not any(key in fields for key in TEXT_FIELDS):
+        raise ValueError("ogni citazione deve avere 'original_text', 'title' o 'doi'")
+    for key in TEXT_FIELDS:
+        if key in fields and not isinstance(fields[key], str):
+            raise ValueError(f"'{key}' deve essere una stringa")
+    if isinstance(fields.get('authors'), str):
+        fields['authors'] = [fields['authors']]
+    if 'year' in fields:
+        fields['year'] = str(fields['year'])
+    fields.setdefault('original_text', fields.get('title') or fields.get('doi'))
+    return Citation(**fields)
+
+
+def result_payload(index: int, result: Dict) -> Dict:
+    return {'index': index, 'citation': result['citation'].to_dict(), **stored_result(result)}
+
+
+class Submission:
+    """Citations submitted in one request and their results as they arrive."""
+
+    def __init__(self, citations: List[Citation], filename: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.citations = citations
+        self.filename = filename
+        self.results: List[Optional[Dict]] = [None] * len(citations)
+        # Positions in arrival order, for streaming
+        self.arrivals: List[int] = []
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.started = False
+        self.changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return len(self.arrivals) == len(self.citations)
+
+    @property
+    def status(self) -> str:
+        if self.done:
+            return 'completed'
+        return 'running' if self.started else 'queued'
+
+    def add(self, index: int, result: Dict) -> None:
+        if self.results[index] is not None:
+            return
+        self.results[index] = result
+        self.arrivals.append(index)
+        if self.done:
+            self.finished = time.time()
+        # Wake every waiter, then start a fresh event for the next change
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+    def snapshot(self) -> Dict:
+        done = [r for r in self.results if r is not None]
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'total': len(self.citations),
+            'completed': len(done),
+            'summary': summarize(done),
+            'results': [result_payload(i, r) if r is not None else None
+                        for i, r in enumerate(self.results)],
+        }
+
+
+class VerificationService:
+    """Bounded queue of citations verified in batches pooled across clients."""
+
+    def __init__(self, queue_size: int = config.API_QUEUE_SIZE,
+                 batch_size: int = config.API_BATCH_SIZE,
+                 batch_window: float = config.API_BATCH_WINDOW,
+                 workers: int = config.API_WORKERS):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.workers = workers
+        self.submissions: Dict[str, Submission] = {}
+        self.batches = 0
+        self.refused = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._parser: Optional[ProcessPoolExecutor] = None
+        self._parsing = 0
+
+    async def start(self, app=None) -> None:
+        from bibliocheck.engine import VerificationEngine
+
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._parser = ProcessPoolExecutor(max_workers=config.API_PARSE_WORKERS)
+        for _ in range(self.workers):
+            # One engine per worker: a run's budget and progress are per engine
+            engine = VerificationEngine()
+            await engine.__aenter__()
+            self._tasks.append(asyncio.ensure_future(self._work(engine)))
+        self._tasks.append(asyncio.ensure_future(self._expire()))
+
+    async def stop(self, app=None) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._parser is not None:
+            self._parser.shutdown(wait=False)
+
+    def submit(self, citations: List[Citation], filename: Optional[str] = None) -> Submission:
+        """Queue the citations of a request; raises ``Overloaded`` if they do not fit."""
+        if self._queue.maxsize - self._queue.qsize() < len(citations):
+            self.refused += 1
+            raise Overloaded(f"coda piena ({self._queue.qsize()}/{self._queue.maxsize} citazioni)")
+        submission = Submission(citations, filename)
+        self.submissions[submission.id] = submission
+        for index in range(len(citations)):
+            self._queue.put_nowait((submission, index))
+        return submission
+
+    async def parse_document(self, filename: str, content: bytes) -> List[Citation]:
+        """Extract the citations of an uploaded document in the parser pool."""
+        from bibliocheck.batch import parse_document
+
+        if self._parsing >= config.API_MAX_PARSING:
+            self.refused += 1
+            raise Overloaded("troppi documenti in elaborazione")
+        self._parsing += 1
+        try:
+            loop = asyncio.get_running_loop()
+            document = await loop.run_in_executor(self._parser, parse_document, (filename, content))
+        finally:
+            self._parsing -= 1
+        if document.error is not None:
+            raise ValueError(document.error)
+        return document.citations
+
+    async def _next_batch(self) -> List:
+        """Wait for work, then gather up to ``batch_size`` items within ``batch_window``."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _work(self, engine) -> None:
+        from bibliocheck.engine import unavailable_result
+
+        try:
+            while True:
+                batch = await self._next_batch()
+                self.batches += 1
+                for submission, _ in batch:
+                    submission.started = True
+
+                def on_result(position, result):
+                    submission, index = batch[position]
+                    submission.add(index, result)
+
+                try:
+                    await engine.verify_all([s.citations[i] for s, i in batch], on_result)
+                except Exception as e:
+                    logger.exception("Errore nella verifica di un batch")
+                    for submission, index in batch:
+                        result = unavailable_result(e)
+                        result['citation'] = submission.citations[index]
+                        submission.add(index, result)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            await engine.__aexit__(None, None, None)
+
+    async def _expire(self) -> None:
+        """Forget finished submissions once their results have been available for a while."""
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.time() - config.API_RESULT_TTL
+            for submission_id, submission in list(self.submissions.items()):
+                if submission.finished is not None and submission.finished < cutoff:
+                    del self.submissions[submission_id]
+
+    def stats(self) -> Dict:
+        from bibliocheck.resilience import breaker_stats
+
+        return {
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'queue_size': self.queue_size,
+            'batches': self.batches,
+            'refused': self.refused,
+            'submissions': len(self.submissions),
+            'coalescing': get_flights().stats(),
+            'breakers': breaker_stats(),
+        }
+
+
+def _json(data, status: int = 200, headers=None):
+    from aiohttp import web
+
+    return web.json_response(data, status=status, headers=headers,
+                             dumps=lambda obj: json.dumps(obj, ensure_ascii=False))
+
+
+def _error(message: str, status: int, headers=None):
+    return _json({'error': message}, status=status, headers=headers)
+
+
+def create_app(service: Optional[VerificationService] = None):
+    """Build the aiohttp application around a (new) verification service."""
+    from aiohttp import web
+
+    service = service or VerificationService()
+    app = web.Application(client_max_size=config.MAX_FILE_SIZE_MB * 1024 * 1024)
+    app.on_startup.append(service.start)
+    app.on_cleanup.append(service.stop)
+
+    def overloaded(e: Overloaded):
+        return _error(str(e), 503, headers={'Retry-After': str(config.API_RETRY_AFTER)})
+
+    def find(request) -> Submission:
+        submission = service.submissions.get(request.match_info['id'])
+        if submission is None:
+            raise web.HTTPNotFound(text=json.dumps({'error': "verifica non trovata"}),
+                                   content_type='application/json')
+        return submission
+
+    async def submit(request):
+        filename = None
+        try:
+            if request.content_type.startswith('multipart/'):
+                form = await request.post()
+                upload = form.get('file')
+                if upload is None or not hasattr(upload, 'file'):
+                    return _error("campo 'file' mancante", 400)
+                filename = upload.filename
+                citations = await service.parse_document(filename, upload.file.read())
+            else:
+                body = await request.json()
+                items = body.get('citations') if isinstance(body, dict) else body
+                if not isinstance(items, list) or not items:
+                    return _error("serve una lista 'citations' non vuota", 400)
+                citations = [citation_from_json(item) for item in items]
+        except Overloaded as e:
+            return overloaded(e)
+        except ValueError as e:
+            return _error(str(e), 400)
+
+        if len(citations) > config.MAX_CITATIONS_LIMIT:
+            return _error(f"massimo {config.MAX_CITATIONS_LIMIT} citazioni per richiesta", 413)
+        try:
+            submission = service.submit(citations, filename)
+        except Overloaded as e:
+            return overloaded(e)
+        base = f"/v1/verifications/{submission.id}"
+        return _json({
+            'id': submission.id,
+            'total': len(citations),
+            'status_url': base,
+            'stream_url': f"{base}/stream",
+        }, status=202, headers={'Location': base})
+
+    async def status(request):
+        return _json(find(request).snapshot())
+
+    async def stream(request):
+        submission = find(request)
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        sent = 0
+        while True:
+            # Taken before writing, so results landing meanwhile are not missed
+            changed = submission.changed
+            while sent < len(submission.arrivals):
+                index = submission.arrivals[sent]
+                line = json.dumps(result_payload(index, submission.results[index]), ensure_ascii=False)
+                await response.write(line.encode('utf-8') + b'\n')
+                sent += 1
+            if submission.done:
+                break
+            await changed.wait()
+        await response.write_eof()
+        return response
+
+    async def health(request):
+        return _json(service.stats())
+
+    app.add_routes([
+        web.post('/v1/verifications', submit),
+        web.get('/v1/verifications/{id}', status),
+        web.get('/v1/verifications/{id}/stream', stream),
+        web.get('/v1/health', health),
+    ])
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="bibliocheck-server",
+        description="Servizio HTTP per la verifica delle bibliografie.",
+    )
+    parser.add_argument("--host", default=config.API_HOST, help="indirizzo (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=config.API_PORT, help="porta (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    from aiohttp import web
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL), format=config.LOG_FORMAT)
+    web.run_app(create_app(), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
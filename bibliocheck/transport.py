@@ -0,0 +1,160 @@
+"""
+Shared HTTP transport for every database client.
+
+One pooled aiohttp session (keep-alive connections, bounded pool size) is
+shared by all providers. Each attempt draws a token from the database's
+rate-limit bucket; transient failures (5xx, timeouts, dropped connections)
+are retried with exponential backoff and full jitter. A request that still
+fails raises ``TransportError`` so callers can tell "database unreachable"
+apart from "no results".
+
+Throttling is not retried here: a 429, or any retryable status sent with
+``Retry-After``, raises ``Throttled`` at once with the delay the server
+asked for, so the caller can wait it out without the wait counting as a
+slow call (see ``resilience.call``).
+"""
+
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import config
+from bibliocheck.ratelimit import get_bucket
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TransportError(Exception):
+    """A request failed permanently or exhausted its retries."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class Throttled(TransportError):
+    """The server asked us to back off for ``retry_after`` seconds (``None`` if unspecified)."""
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message, status)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0.0), config.RETRY_AFTER_MAX)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    ceiling = min(config.RETRY_BACKOFF_MAX, config.RETRY_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+class Transport:
+    """Pooled, rate-limited, retrying HTTP client.
+
+    Use as an async context manager, or call ``open()``/``close()``.
+    """
+
+    def __init__(self, timeout: float = config.REQUEST_TIMEOUT,
+                 max_retries: int = config.MAX_RETRIES,
+                 pool_size: int = config.HTTP_POOL_SIZE,
+                 pool_per_host: int = config.HTTP_POOL_PER_HOST,
+                 keepalive: float = config.HTTP_KEEPALIVE_SECONDS):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.pool_per_host = pool_per_host
+        self.keepalive = keepalive
+        self._session = None
+
+    async def open(self) -> None:
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_per_host,
+            keepalive_timeout=self.keepalive,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={'User-Agent': config.USER_AGENT},
+        )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _request(self, db_id: str, url: str, params: Optional[Dict],
+                       read: Callable, allow_404: bool, headers: Optional[Dict] = None) -> Any:
+        import aiohttp
+
+        last_error: Optional[TransportError] = None
+        for attempt in range(self.max_retries + 1):
+            await get_bucket(db_id).acquire()
+            try:
+                async with self._session.get(url, params=params, headers=headers) as response:
+                    if response.status == 404 and allow_404:
+                        return None
+                    if response.status in RETRY_STATUSES:
+                        delay = parse_retry_after(response.headers.get('Retry-After'))
+                        if response.status == 429 or delay is not None:
+                            raise Throttled(f"{db_id}: HTTP {response.status}",
+                                            status=response.status, retry_after=delay)
+                        last_error = TransportError(
+                            f"{db_id}: HTTP {response.status}", status=response.status
+                        )
+                    elif response.status >= 400:
+                        raise TransportError(
+                            f"{db_id}: HTTP {response.status}", status=response.status
+                        )
+                    else:
+                        return await read(response)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = TransportError(f"{db_id}: {type(e).__name__}: {e}")
+
+            if attempt < self.max_retries:
+                delay = backoff_delay(attempt)
+                logger.info("%s - nuovo tentativo tra %.1fs", last_error, delay)
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+    async def get_json(self, db_id: str, url: str, params: Optional[Dict] = None,
+                       allow_404: bool = False, headers: Optional[Dict] = None) -> Any:
+        """GET ``url`` and decode JSON; ``None`` for a 404 when ``allow_404``."""
+        return await self._request(
+            db_id, url, params, lambda r: r.json(content_type=None), allow_404, headers
+        )
+
+    async def get_text(self, db_id: str, url: str, params: Optional[Dict] = None,
+                       allow_404: bool = False, headers: Optional[Dict] = None) -> Optional[str]:
+        """GET ``url`` and return the body as text; ``None`` for a 404 when ``allow_404``."""
+        return await self._request(db_id, url, params, lambda r: r.text(), allow_404, headers)
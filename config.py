@@ -62,6 +62,7 @@ PREMIUM_DATABASES = {
         "base_url": "https://ieeexploreapi.ieee.org/api/v1/search/articles",
         "description": "5M+ technical documents from IEEE",
         "rate_limit": 200, # requests per day for basic plan
+        "rate_period": 86400,  # rate_limit is expressed per day
         "enabled": bool(IEEE_API_KEY),
         "api_key": IEEE_API_KEY
     }
@@ -103,6 +104,10 @@ BIBLIOGRAPHY_PATTERNS = [
     r'(?i)literatur\s*\n'
 ]
 
+# Pages scanned backwards from the end of a PDF looking for a bibliography
+# heading before falling back to the last 30% of the document
+BIBLIOGRAPHY_SCAN_PAGES = 60
+
 # =============================================================================
 # MATCHING CONFIGURATION
 # =============================================================================
@@ -116,6 +121,12 @@ SIMILARITY_THRESHOLDS = {
     "minimum_confidence": 0.6      # Minimum confidence for uncertain matches
 }
 
+# Score cut-offs used to classify a verification result
+STATUS_THRESHOLDS = {
+    "verified": 0.8,   # Best match at or above this score is verified
+    "uncertain": 0.6   # Below "verified" but at or above this is uncertain
+}
+
 # Weights for calculating overall similarity score
 SIMILARITY_WEIGHTS = {
     "title": 0.4,     # Title similarity weight
@@ -142,7 +153,8 @@ ERROR_TYPES = {
 
 # File upload limits
 MAX_FILE_SIZE_MB = 50              # Maximum file size in MB
-SUPPORTED_FORMATS = [".pdf", ".docx"]  # Supported document formats
+# Documents, plus BibTeX/RIS/CSL-JSON exports of a reference manager
+SUPPORTED_FORMATS = [".pdf", ".docx", ".bib", ".ris", ".json"]
 MAX_CITATIONS_DEFAULT = 50         # Default max citations to process
 MAX_CITATIONS_LIMIT = 200          # Hard limit for citations
 
@@ -150,13 +162,45 @@ MAX_CITATIONS_LIMIT = 200          # Hard limit for citations
 DEFAULT_RATE_LIMIT_DELAY = 1.0     # Delay between API calls (seconds)
 REQUEST_TIMEOUT = 30               # API request timeout (seconds)
 MAX_RETRIES = 3                    # Max retries for failed requests
+MAX_CONCURRENT_REQUESTS = 20       # Citations verified in flight at once
+DOI_BATCH_SIZE = 20                # DOIs resolved per CrossRef request
+CROSSREF_BROAD_ROWS = 10           # Rows fetched by the broadest CrossRef query stage
+
+# HTTP transport configuration
+HTTP_POOL_SIZE = 100               # Max open connections across all databases
+HTTP_POOL_PER_HOST = 20            # Max open connections to a single database
+HTTP_KEEPALIVE_SECONDS = 30        # Idle time before a pooled connection is closed
+RETRY_BACKOFF_BASE = 0.5           # First retry delay (seconds), doubled per attempt
+RETRY_BACKOFF_MAX = 30.0           # Cap on a single retry delay (seconds)
+RETRY_AFTER_MAX = 120.0            # Cap on server-requested Retry-After waits (seconds)
+
+# Tail-latency controls (see bibliocheck/resilience.py)
+RUN_BUDGET_SECONDS = 300           # Wall-clock budget of a verification run (None = unlimited)
+CALL_TIMEOUT_MAX = 10.0            # Deadline of one database call, retries included (seconds);
+                                   # Retry-After waits (up to RETRY_AFTER_MAX) are not counted
+CALL_TIMEOUT_MIN = 1.0             # Calls are not started with less budget left (seconds)
+HEDGE_ENABLED = True               # Duplicate a call still running after the database's p95
+HEDGE_MIN_SAMPLES = 20             # Latencies needed before hedging starts
+LATENCY_WINDOW = 200               # Recent latencies kept per database for the p95
+CIRCUIT_WINDOW = 20                # Recent calls considered by a circuit breaker
+CIRCUIT_MIN_CALLS = 5              # Calls needed before a breaker can open
+CIRCUIT_FAILURE_RATE = 0.5         # Share of failed or slow calls that opens it
+CIRCUIT_SLOW_CALL_SECONDS = 8.0    # A call slower than this counts as bad
+CIRCUIT_OPEN_SECONDS = 30.0        # Time an open breaker fails fast before a probe
+
+# Contact address sent to the databases; CrossRef routes requests that carry
+# one to its faster "polite" pool
+CONTACT_EMAIL = os.getenv("BIBLIOCHECK_MAILTO", "")
+USER_AGENT = "BiblioCheck/1.0 (https://github.com/gabrielebiagini/bibliocheck" + (
+    f"; mailto:{CONTACT_EMAIL})" if CONTACT_EMAIL else ")"
+)
 
 # UI Configuration
 APP_TITLE = "📚 Bibliography Checker"
 APP_DESCRIPTION = "Verifica automatica e accurata delle tue bibliografie accademiche"
 SIDEBAR_INFO = """
 **Come funziona:**
-1. Carica il tuo PDF o DOCX
+1. Carica il tuo PDF o DOCX (o un file .bib, .ris, CSL-JSON)
 2. Il sistema estrae automaticamente le citazioni  
 3. Ogni citazione viene verificata su database accademici
 4. Ricevi un report dettagliato con errori e suggerimenti
@@ -168,6 +212,8 @@ COLORS = {
     "error": "#e53e3e",        # Red  
     "not_found": "#d69e2e",    # Orange
     "uncertain": "#805ad5",    # Purple
+    "unavailable": "#718096",  # Grey
+    "unverified": "#a0aec0",   # Light grey
     "primary": "#667eea",      # Blue
     "secondary": "#764ba2"     # Purple
 }
@@ -176,10 +222,57 @@ COLORS = {
 # ADVANCED CONFIGURATION
 # =============================================================================
 
-# Cache configuration (if implementing caching)
+# Cache configuration
 CACHE_ENABLED = True
 CACHE_TTL_HOURS = 24               # Cache time-to-live in hours
 CACHE_MAX_SIZE = 1000              # Max number of cached results
+CACHE_DIR = os.getenv("BIBLIOCHECK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bibliocheck"))
+CACHE_PATH = os.path.join(CACHE_DIR, "lookups.sqlite3")
+
+# Verification verdicts stored per citation fingerprint, so unchanged
+# references in a revised document are not verified again
+VERDICT_STORE_ENABLED = True
+VERDICT_TTL_HOURS = 24 * 30        # Verdicts older than this are verified again
+VERDICT_MAX_SIZE = 100000          # Max number of stored verdicts and runs
+VERDICT_STORE_PATH = os.path.join(CACHE_DIR, "verdicts.sqlite3")
+
+# Background verification jobs, checkpointed so they survive closed sessions
+JOBS_PATH = os.path.join(CACHE_DIR, "jobs.sqlite3")
+JOB_WORKERS = 2                    # Jobs verified at the same time
+JOB_POLL_SECONDS = 1.0             # How often the UI refreshes a running job
+RESULTS_PAGE_SIZE = 50             # Rows per page of the problematic citations table
+
+# OCR of scanned PDF pages, used when FEATURES["enable_pdf_ocr"] is on
+OCR_LANGUAGES = "eng+ita"          # Tesseract language packs
+OCR_MIN_TEXT_CHARS = 20            # Pages with less extractable text are OCRed
+OCR_CACHE_PATH = os.path.join(CACHE_DIR, "ocr.sqlite3")
+OCR_CACHE_TTL_HOURS = 24 * 90      # OCR output cached per page image hash
+OCR_CACHE_MAX_SIZE = 20000
+
+# HTTP API service (`bibliocheck-server`, see bibliocheck/server.py)
+API_HOST = os.getenv("BIBLIOCHECK_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("BIBLIOCHECK_API_PORT", "8080"))
+API_QUEUE_SIZE = 2000              # Citations waiting; larger backlogs are refused with 503
+API_BATCH_SIZE = 100               # Citations of different clients pooled into one engine run
+API_BATCH_WINDOW = 0.2             # Wait for more citations before starting a partial batch (seconds)
+API_WORKERS = 2                    # Batches verified at once
+API_PARSE_WORKERS = 2              # Processes parsing uploaded documents
+API_MAX_PARSING = 8                # Uploads being parsed at once; more are refused with 503
+API_RESULT_TTL = 3600              # Seconds a finished submission can still be fetched
+API_RETRY_AFTER = 10               # Retry-After (seconds) sent with a 503
+
+# Near-duplicate index of works resolved by earlier lookups
+RESOLVED_INDEX_ENABLED = True
+RESOLVED_INDEX_PATH = os.path.join(CACHE_DIR, "resolved.sqlite3")
+RESOLVED_INDEX_MAX_SIZE = 100000   # Works kept (reloaded at startup); later ones are not indexed
+RESOLVED_PROBE_NGRAMS = 16         # Rarest title trigrams probed per lookup
+RESOLVED_CANDIDATES = 10           # Nearest records scored per lookup
+RESOLVED_TITLE_RATIO = 0.95        # Whole-title similarity for an offline match (see same_title)
+RESOLVED_MATCH_MARGIN = 0.03       # Lead the matched title needs over any other record's
+
+# Offline reference index, built with `bibliocheck-index build DUMP...`
+LOCAL_INDEX_ENABLED = True
+LOCAL_INDEX_PATH = os.getenv("BIBLIOCHECK_INDEX", os.path.join(CACHE_DIR, "index.sqlite3"))
 
 # Logging configuration
 LOG_LEVEL = "INFO"                 # DEBUG, INFO, WARNING, ERROR
@@ -188,10 +281,10 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 # Feature flags
 FEATURES = {
     "enable_ml_similarity": False,     # Use ML models for similarity (requires additional deps)
-    "enable_batch_processing": False,  # Allow multiple file uploads
+    "enable_batch_processing": True,   # Allow multiple file uploads
     "enable_user_auth": False,         # User authentication (future feature)
     "enable_analytics": False,         # Usage analytics (future feature)
-    "enable_pdf_ocr": False           # OCR for scanned PDFs (requires tesseract)
+    "enable_pdf_ocr": False           # OCR for scanned PDFs (requires tesseract, `ocr` extra)
 }
 
 # Development settings
@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from bibliocheck.bibfiles import iter_bibtex, iter_csl_json, read_reference_file
+
+
+def bibtex(text):
+    return list(iter_bibtex(io.StringIO(text)))
+
+
+def test_parenthesis_in_braced_value_does_not_close_entry():
+    items = bibtex("@article{k, title={Smiley :) results}, year=2019}\n")
+    assert items == [{'type': 'article-journal', 'title': 'Smiley :) results',
+                      'issued': {'date-parts': [[2019]]}}]
+
+
+def test_unbalanced_parenthesis_does_not_swallow_the_file():
+    items = bibtex(
+        "@article{a,\n"
+        "  title = {Attention (is all you need},\n"
+        "  year = 2017\n"
+        "}\n"
+        "@book{b, title = {Second entry}, year = 2018}\n"
+    )
+    assert [item['title'] for item in items] == ['Attention (is all you need', 'Second entry']
+
+
+def test_several_entries_on_one_line():
+    items = bibtex("@misc{a, title={One}} @misc{b, title={Two}}@misc{c, title={Three}}\n")
+    assert [item['title'] for item in items] == ['One', 'Two', 'Three']
+
+
+def test_parenthesis_delimited_entry():
+    items = bibtex('@article(k, title = "Open ( paren", note = {closed ) here}, year = 1999)\n')
+    assert items[0]['title'] == 'Open ( paren'
+    assert items[0]['issued'] == {'date-parts': [[1999]]}
+
+
+def test_closing_brace_inside_quoted_value():
+    items = bibtex('@misc{k, title = "A {nested} value", year = "2001"} @misc{j, title={Next}}\n')
+    assert [item['title'] for item in items] == ['A nested value', 'Next']
+
+
+def test_unclosed_brace_is_dropped_not_swallowing():
+    items = bibtex(
+        "@article{a, title = {Broken {brace}, year = 2017}\n"
+        "@book{b, title = {Survivor}, year = 2018}\n"
+    )
+    assert [item['title'] for item in items] == ['Survivor']
+
+
+def test_string_macros():
+    items = bibtex('@string{jml = "Journal of ML"}\n@article{k, title={T}, journal = jml # " Letters"}\n')
+    assert items[0]['container-title'] == 'Journal of ML Letters'
+
+
+def test_csl_json_array_in_small_chunks():
+    text = '[{"title": "One", "type": "book"}, {"title": "Two"}]'
+    chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+    assert [item['title'] for item in iter_csl_json(chunks)] == ['One', 'Two']
+
+
+@pytest.mark.parametrize('text', [
+    '[{"title": "One"}, {"title": "Tw',
+    '[{"title": "One"}, {"title": }]',
+])
+def test_malformed_csl_json_raises(text):
+    with pytest.raises(ValueError, match="CSL-JSON non valido"):
+        list(iter_csl_json([text]))
+
+
+def test_read_reference_file_bibtex():
+    source = io.BytesIO(b"@article{k, author={Rossi, Mario and Bianchi, Luca}, "
+                        b"title={Graphs (and trees)}, year=2020, doi={10.1000/xyz}}\n")
+    citations = read_reference_file(source, 'refs.bib')
+    assert len(citations) == 1
+    assert citations[0].title == 'Graphs (and trees)'
+    assert citations[0].doi == '10.1000/xyz'
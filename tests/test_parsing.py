@@ -0,0 +1,30 @@
+from bibliocheck.parsing import (find_bibliography_heading, find_bibliography_section,
+                                 parse_citations)
+
+PAGE = (
+    "as discussed in the conclusions.\n"
+    "References\n"
+    "Adams, J. (2018). A study of graph algorithms. Journal of Graphs, 4, 1-10.\n"
+    "Brown, K. (2019). Citation practices and the use of cross references\n"
+    "in theses. Library Review, 7, 20-31.\n"
+    "Clark, L. (2020). Automated checking of every cited reference\n"
+    "in large corpora. Data Journal, 2, 5-9.\n"
+    "Davis, M. (2021). Evaluating bibliography tools. Software Review, 9, 44-50.\n"
+)
+
+
+def test_wrapped_references_line_is_not_a_heading():
+    offset = find_bibliography_heading(PAGE)
+    assert PAGE[offset:].startswith("References\n")
+    citations = parse_citations(PAGE[offset:])
+    assert [c.authors[0] for c in citations] == ['Adams, J.', 'Brown, K.', 'Clark, L.', 'Davis, M.']
+
+
+def test_heading_inside_a_sentence_is_ignored():
+    text = "Body text that mentions the references\nand goes on.\n"
+    assert find_bibliography_heading(text) is None
+
+
+def test_numbered_heading():
+    text = "Body.\n7. References\nAdams, J. (2018). A study of graph algorithms. J, 4, 1-10.\n"
+    assert find_bibliography_section(text).startswith("7. References\n")
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+
+import config
+from bibliocheck import engine, resilience
+from bibliocheck.cache import LookupCache
+from bibliocheck.models import Citation
+from bibliocheck.resolved import ResolvedIndex
+from bibliocheck.transport import Throttled
+
+
+@pytest.fixture
+def db_id():
+    # Breakers are process-wide: a fresh database name per test
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def slow(seconds, value=None):
+    async def fetch():
+        await asyncio.sleep(seconds)
+        return value
+    return fetch
+
+
+async def call_times(db_id, fetch, timeout, times):
+    errors = []
+    for _ in range(times):
+        try:
+            await resilience.call(db_id, fetch, timeout)
+        except resilience.DeadlineExceeded as e:
+            errors.append(e)
+    return errors
+
+
+def test_budget_share_deadline_does_not_trip_breaker(db_id):
+    # Shorter than CALL_TIMEOUT_MAX: the caller's budget ran out, not the database
+    errors = asyncio.run(call_times(db_id, slow(0.2), timeout=0.05, times=10))
+    assert len(errors) == 10
+    assert resilience.get_breaker(db_id).state == resilience.CLOSED
+
+
+def test_full_timeout_trips_breaker(db_id, monkeypatch):
+    monkeypatch.setattr(config, 'CALL_TIMEOUT_MAX', 0.05)
+    asyncio.run(call_times(db_id, slow(0.2), timeout=0.05, times=config.CIRCUIT_MIN_CALLS))
+    assert resilience.get_breaker(db_id).state == resilience.OPEN
+    with pytest.raises(resilience.CircuitOpenError):
+        asyncio.run(resilience.call(db_id, slow(0), timeout=0.05))
+
+
+def throttled_once(retry_after, value='ok'):
+    calls = []
+
+    async def fetch():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise Throttled("test: HTTP 429", status=429, retry_after=retry_after)
+        return value
+    return fetch, calls
+
+
+def test_retry_after_longer_than_call_timeout_is_waited_out(db_id, monkeypatch):
+    monkeypatch.setattr(config, 'CALL_TIMEOUT_MAX', 0.05)
+    breaker = resilience.get_breaker(db_id)
+    for _ in range(config.HEDGE_MIN_SAMPLES):
+        breaker.record_success(0.001)
+    fetch, calls = throttled_once(0.2)
+    assert asyncio.run(resilience.call(db_id, fetch, timeout=0.05)) == 'ok'
+    # One request per attempt: no duplicate was hedged while backing off
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.2
+    assert breaker.hedges == 0
+
+
+def test_throttling_does_not_trip_breaker(db_id):
+    async def fetch():
+        raise Throttled("test: HTTP 429", status=429, retry_after=0)
+
+    for _ in range(config.CIRCUIT_MIN_CALLS):
+        with pytest.raises(Throttled):
+            asyncio.run(resilience.call(db_id, fetch, timeout=1))
+    assert resilience.get_breaker(db_id).state == resilience.CLOSED
+
+
+def test_retry_after_past_the_deadline(db_id):
+    fetch, calls = throttled_once(60)
+    with pytest.raises(resilience.DeadlineExceeded):
+        asyncio.run(resilience.call(db_id, fetch, timeout=1, deadline=time.monotonic() + 5))
+    assert len(calls) == 1
+    assert resilience.get_breaker(db_id).state == resilience.CLOSED
+
+
+class SlowProvider:
+    """A healthy database that answers every search, just slowly."""
+
+    def __init__(self, db_id, latency):
+        self.db_id = db_id
+        self.latency = latency
+
+    def is_relevant(self, citation):
+        return True
+
+    def query(self, citation):
+        return citation.original_text
+
+    async def search(self, citation, max_results=3):
+        await asyncio.sleep(self.latency)
+        return [{'title': citation.title, 'authors': citation.authors, 'year': citation.year}]
+
+
+def test_slow_healthy_provider_under_budget(db_id, monkeypatch):
+    monkeypatch.setattr(config, 'CALL_TIMEOUT_MIN', 0.05)
+    monkeypatch.setattr(engine, 'get_local_index', lambda: None)
+    citations = [
+        Citation(f"Rossi, M. (2020). Graph study number {i}.", authors=['Rossi, M.'],
+                 year='2020', title=f"Graph study number {i}")
+        for i in range(40)
+    ]
+
+    async def run():
+        # Fair share of 1.2s over 40 citations, 4 at a time: ~0.12s per call, below the latency
+        async with engine.VerificationEngine(
+                max_concurrency=4, cache=LookupCache(':memory:'),
+                verdicts=LookupCache(':memory:'), resolved=ResolvedIndex(path=None),
+                providers=[SlowProvider(db_id, 0.3)], budget=1.2) as verifier:
+            return await verifier.verify_all(citations)
+
+    statuses = [result['status'] for result in asyncio.run(run())]
+    assert resilience.get_breaker(db_id).state == resilience.CLOSED
+    assert 'unavailable' not in statuses
+    assert 'unverified' in statuses
@@ -0,0 +1,47 @@
+import pytest
+
+from bibliocheck.models import Citation
+from bibliocheck.resolved import ResolvedIndex
+
+VASWANI = {'title': 'Attention is all you need', 'authors': ['Vaswani, Ashish', 'Shazeer, Noam'],
+           'year': '2017', 'doi': '10.5555/3295222.3295349'}
+PART_ONE = {'title': 'A survey of graph neural networks for molecular property prediction: Part I',
+            'authors': ['Rossi, Mario'], 'year': '2021', 'doi': '10.1000/survey.1'}
+NUMBER_TWO = {'title': 'Title number 2', 'authors': ['Bianchi, Luca'], 'year': '2019'}
+
+
+@pytest.fixture
+def index():
+    index = ResolvedIndex(path=None)
+    for record in (VASWANI, PART_ONE, NUMBER_TWO):
+        index.add(record)
+    return index
+
+
+def cite(title, author, year, doi=None):
+    return Citation(f"{author} ({year}). {title}.", authors=[author], year=year, title=title, doi=doi)
+
+
+def test_same_work_spelled_differently(index):
+    result = index.match(cite('Attention Is All You Need!', 'Vaswani, A.', '2017'))
+    assert result['status'] == 'verified'
+    assert result['best_match']['doi'] == VASWANI['doi']
+
+
+@pytest.mark.parametrize('citation', [
+    cite('Attention is not all you need', 'Vaswani, A.', '2017'),
+    cite('A survey of graph neural networks for molecular property prediction: Part II',
+         'Rossi, M.', '2021'),
+    cite('Title number 21', 'Bianchi, L.', '2019'),
+    cite('Attention is all you need', 'Smith, J.', '2017'),
+    cite('Attention is all you need', 'Vaswani, A.', '2019'),
+    cite('Attention is all you need', 'Vaswani, A.', '2017', doi='10.1000/other'),
+    cite('Attention is all you need', 'Vaswani, A.', None),
+])
+def test_different_work_falls_through(index, citation):
+    assert index.match(citation) is None
+
+
+def test_ambiguous_match_falls_through(index):
+    index.add({'title': 'Attention is all you needed', 'authors': ['Vaswani, A.'], 'year': '2017'})
+    assert index.match(cite('Attention is all you neede', 'Vaswani, A.', '2017')) is None